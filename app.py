@@ -1,24 +1,18 @@
 import streamlit as st
-import joblib
+import os
+import itertools
 import numpy as np
 import pandas as pd
-import re
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from nltk.stem import WordNetLemmatizer
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
-# Download NLTK data
-try:
-    stop_words = set(stopwords.words('english'))
-    lemmatizer = WordNetLemmatizer()
-except LookupError:
-    nltk.download('punkt_tab')
-    nltk.download('stopwords')
-    nltk.download('wordnet')
-    nltk.download('omw-1.4')
-    stop_words = set(stopwords.words('english'))
-    lemmatizer = WordNetLemmatizer()
+from artifacts import load_model, load_vectorizer
+from categories import load_category_table
+from evaluation import evaluate_dataset, holdout_path
+from inference import LengthPolicy, classify_batch
+from monitoring import PredictionMonitor
+from preprocessing import detect_language
+from tracing import span, trace_request
 
 # Page config
 st.set_page_config(
@@ -127,102 +121,174 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-# Text preprocessing function
-def clean_text(text):
-    """Clean and preprocess text for prediction"""
-    if pd.isna(text) or not str(text).strip():
-        return ''
-    text = str(text).lower().strip()
-    
-    # Remove URLs, emails, special characters, digits
-    text = re.sub(r'http\S+|www\S+|https\S+', '', text)
-    text = re.sub(r'\S+@\S+', '', text)
-    text = re.sub(r'[^a-z\s]', '', text)
-    text = re.sub(r'\s+', ' ', text).strip()
-    
-    # Tokenize
-    words = word_tokenize(text)
-    
-    # Remove stopwords
-    words = [w for w in words if w not in stop_words]
-    
-    # Lemmatize
-    words = [lemmatizer.lemmatize(w, pos='v') for w in words]
-    
-    # Remove short words
-    words = [w for w in words if len(w) > 2]
-    
-    return ' '.join(words)
-
-# Load models (cached)
-@st.cache_data
+# Load models (cached). cache_resource shares one read-only copy instead of
+# pickling and unpickling the artifacts on every rerun like cache_data does
+@st.cache_resource
 def load_model_d1(model_name):
     """Load Dataset 1 models"""
-    if model_name == 'Logistic Regression':
-        model = joblib.load('logistic_model_D1.pkl')
-    else:
-        model = joblib.load('svm_model_D1.pkl')
-    return model
+    return load_model('D1', model_name)
 
-@st.cache_data
+@st.cache_resource
 def load_model_d2(model_name):
     """Load Dataset 2 models"""
-    if model_name == 'Logistic Regression':
-        model = joblib.load('logistic_model_D2.pkl')
-    else:
-        model = joblib.load('svm_model_D2.pkl')
-    return model
+    return load_model('D2', model_name)
 
-@st.cache_data
+@st.cache_resource
 def load_vectorizer_d1():
     """Load Dataset 1 vectorizer"""
-    return joblib.load('tfidf_vectorizer_D1.pkl')
+    return load_vectorizer('D1')
 
-@st.cache_data
+@st.cache_resource
 def load_vectorizer_d2():
     """Load Dataset 2 vectorizer"""
-    return joblib.load('tfidf_vectorizer_D2.pkl')
+    return load_vectorizer('D2')
 
-@st.cache_data
-def load_encoder_d1():
-    """Load Dataset 1 label encoder"""
-    return joblib.load('label_encoder_D1.pkl')
+@st.cache_resource
+def load_category_table_d1():
+    """Load Dataset 1 category names, icons and routing"""
+    return load_category_table('D1')
 
-@st.cache_data
-def load_encoder_d2():
-    """Load Dataset 2 label encoder"""
-    return joblib.load('label_encoder_D2.pkl')
+@st.cache_resource
+def load_category_table_d2():
+    """Load Dataset 2 category names, icons and routing"""
+    return load_category_table('D2')
 
-# Helper function to get icon for category
-def get_category_icon(category_name):
-    """Returns the icon class for a given category name."""
-    # Normalize the category name by removing underscores and case-insensitive matching
-    normalized_name = category_name.lower().replace('_', ' ').strip()
-    
-    icon_mapping = {
-        'credit card': 'ri-bank-card-line',
-        'retail banking': 'ri-store-3-line',
-        'credit report': 'ri-bar-chart-line',
-        'credit reporting': 'ri-bar-chart-line',
-        'mortgages': 'ri-home-line',
-        'mortgages & loans': 'ri-home-line',
-        'mortgage': 'ri-home-line',
-        'debt collection': 'ri-phone-line',
-        'loan': 'ri-money-dollar-circle-line',
-        'bank account': 'ri-bank-line'
-    }
-    
-    # Try exact match
-    if normalized_name in icon_mapping:
-        return icon_mapping[normalized_name]
-    
-    # Try partial matching for categories that might have extra words
-    for key in icon_mapping:
-        if key in normalized_name or normalized_name in key:
-            return icon_mapping[key]
-    
-    # Default icon
-    return 'ri-checkbox-circle-fill'
+# Bound on how much of a pasted complaint is processed
+LENGTH_POLICY = LengthPolicy.from_env()
+
+def show_length_notice(cost):
+    """Tell the user when only part of a long complaint was analyzed"""
+    if cost['truncated']:
+        st.info(f"ℹ️ This complaint is {cost['chars_received']:,} characters long; "
+                f"the first {cost['chars_processed']:,} characters were analyzed.")
+    elif cost['chunks'] > 1:
+        st.info(f"ℹ️ This long complaint was analyzed in {cost['chunks']} parts and the results combined.")
+
+def show_unprocessed_warning(complaint_text):
+    """Explain why nothing was left of a complaint after cleaning"""
+    language = detect_language(complaint_text)
+    if language not in (None, 'english'):
+        st.warning(f"⚠️ This complaint appears to be written in {language.title()}. "
+                   "The models only support English complaints.")
+    else:
+        st.warning("⚠️ The complaint text could not be processed. Please enter a more descriptive complaint.")
+
+def analyze_complaints(dataset, model_choice, complaints, model, vectorizer, categories):
+    """Classify complaints and look up their categories, traced as one request
+
+    Returns ``(prediction, score, cleaned_text, cost, category)`` per complaint, where
+    category is the row of the category table (display name, icon, queue, SLA), or
+    None for complaints with nothing left after cleaning.
+    """
+    with trace_request('analyze', dataset=dataset, model=model_choice, rows=len(complaints),
+                       chars=sum(len(complaint) for complaint in complaints)) as trace:
+        results = classify_batch(complaints, model, vectorizer, LENGTH_POLICY)
+        predicted = [prediction for prediction, _, _, _ in results if prediction is not None]
+        with span('category_lookup'):
+            rows = iter(categories.records(predicted))
+        
+        analyzed = [(prediction, score, cleaned_text, cost, None if prediction is None else next(rows))
+                    for prediction, score, cleaned_text, cost in results]
+        if trace is not None:
+            trace.attributes.update(chunks=sum(cost['chunks'] for _, _, _, cost in results),
+                                    truncated=sum(cost['truncated'] for _, _, _, cost in results))
+        return analyzed
+
+# Complaints per executor task in multi-complaint analysis, the most accepted at once,
+# and how many of one session's batches may wait on the shared pool at a time
+BATCH_SIZE = 64
+MAX_BATCH_ROWS = 10000
+BATCHES_IN_FLIGHT = 2
+
+@st.cache_resource
+def get_executor():
+    """Inference thread pool shared by all sessions, sized by INFERENCE_WORKERS"""
+    return ThreadPoolExecutor(max_workers=int(os.environ.get('INFERENCE_WORKERS', os.cpu_count() or 2)),
+                              thread_name_prefix='inference')
+
+def read_uploaded_complaints(uploaded_file):
+    """Complaints from an uploaded CSV, JSON array or JSONL file (complaints column) or text file (one per line)
+
+    Raises ValueError if the file cannot be parsed or has no complaints column.
+    """
+    name = uploaded_file.name.lower()
+    if name.endswith('.csv') or name.endswith('.jsonl') or name.endswith('.json'):
+        if name.endswith('.csv'):
+            frame = pd.read_csv(uploaded_file)
+        else:
+            frame = pd.read_json(uploaded_file, lines=name.endswith('.jsonl'))
+        if 'complaints' not in frame.columns:
+            raise ValueError(f"{uploaded_file.name} has no 'complaints' column "
+                             f"(found: {', '.join(map(str, frame.columns)) or 'none'})")
+        return frame['complaints'].dropna().astype(str).tolist()
+    lines = uploaded_file.getvalue().decode('utf-8', errors='replace').splitlines()
+    return [line for line in lines if line.strip()]
+
+def batch_analysis(dataset, model_choice, model, vectorizer, categories):
+    """Classify many complaints at once, showing results as each batch finishes"""
+    with st.expander("📄 Analyze many complaints"):
+        pasted = st.text_area("One complaint per line", height=110, key=f"batch_text_{dataset}")
+        uploaded = st.file_uploader("Or upload a file (CSV, JSON or JSONL with a 'complaints' column, or plain text)",
+                                    type=['csv', 'jsonl', 'json', 'txt'], key=f"batch_file_{dataset}")
+        if not st.button("🔍 Analyze All", key=f"batch_predict_{dataset}", use_container_width=True):
+            return
+        
+        try:
+            complaints = read_uploaded_complaints(uploaded) if uploaded is not None else \
+                [line for line in pasted.splitlines() if line.strip()]
+        except ValueError as e:
+            st.error(f"⚠️ Could not read the uploaded file: {e}")
+            return
+        if not complaints:
+            st.error("⚠️ Please paste or upload complaints before predicting!")
+            return
+        if len(complaints) > MAX_BATCH_ROWS:
+            st.warning(f"⚠️ Only the first {MAX_BATCH_ROWS:,} of {len(complaints):,} complaints will be analyzed.")
+            complaints = complaints[:MAX_BATCH_ROWS]
+        
+        progress = st.progress(0.0, text="Analyzing complaints...")
+        table = st.empty()
+        rows = []
+        monitor = get_monitor()
+        
+        # The pool is first-in, first-out and shared by every session, so only a few of this
+        # upload's batches wait on it at once; other analysts' requests queue behind those, not all of it
+        starts = iter(range(0, len(complaints), BATCH_SIZE))
+        pending = deque()
+        try:
+            while True:
+                for start in itertools.islice(starts, BATCHES_IN_FLIGHT - len(pending)):
+                    pending.append(get_executor().submit(analyze_complaints, dataset, model_choice,
+                                                         complaints[start:start + BATCH_SIZE], model, vectorizer,
+                                                         categories))
+                if not pending:
+                    break
+                for prediction, score, cleaned_text, cost, category in pending.popleft().result():
+                    complaint = complaints[len(rows)]
+                    if prediction is None:
+                        monitor.record(dataset, model_choice, -1, 0.0, 0, 0, cost['latency_ms'])
+                        category = {}
+                    else:
+                        monitor.record_prediction(dataset, model_choice, cleaned_text, vectorizer.vocabulary_,
+                                                  prediction, score, cost['latency_ms'])
+                    rows.append({'Complaint': complaint[:200], 'Category': category.get('display_name'), 'Score': score,
+                                 'Queue': category.get('queue'), 'SLA (days)': category.get('sla_days')})
+                progress.progress(len(rows) / len(complaints), text=f"Analyzed {len(rows):,} of {len(complaints):,} complaints")
+                table.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+        finally:
+            # A rerun or page change stops the script here; drop this session's queued batches
+            for future in pending:
+                future.cancel()
+        progress.empty()
+        
+        results = pd.DataFrame(rows)
+        st.download_button("⬇️ Download results (CSV)", results.to_csv(index=False).encode('utf-8'),
+                           file_name=f"classified_{dataset}.csv", mime='text/csv', key=f"batch_download_{dataset}")
+
+@st.cache_resource
+def get_monitor():
+    """Prediction monitor shared by all sessions"""
+    return PredictionMonitor()
 
 # Session state for navigation
 if 'current_page' not in st.session_state:
@@ -380,6 +446,11 @@ def dataset1_page():
         </div>
     """, unsafe_allow_html=True)
     
+    dataset1_analyzer()
+
+@st.fragment
+def dataset1_analyzer():
+    """Model choice, complaint input and results; reruns on its own, without the page around it"""
     # Model selection with enhanced styling
     st.markdown("""
         <div style="margin-bottom: 10px;">
@@ -445,25 +516,24 @@ def dataset1_page():
             st.error("⚠️ Please enter a complaint before predicting!")
         else:
             with st.spinner("Analyzing complaint..."):
-                # Clean text
-                cleaned_text = clean_text(complaint_text)
+                # Load models
+                model = load_model_d1(model_choice)
+                vectorizer = load_vectorizer_d1()
+                categories = load_category_table_d1()
                 
-                if not cleaned_text:
-                    st.warning("⚠️ The complaint text could not be processed. Please enter a more descriptive complaint.")
+                # Clean, transform and predict within the length policy
+                prediction, score, cleaned_text, cost, category = get_executor().submit(
+                    analyze_complaints, 'D1', model_choice, [complaint_text], model, vectorizer, categories).result()[0]
+                
+                if prediction is None:
+                    get_monitor().record('D1', model_choice, -1, 0.0, 0, 0, cost['latency_ms'])
+                    show_unprocessed_warning(complaint_text)
                 else:
-                    # Load models
-                    model = load_model_d1(model_choice)
-                    vectorizer = load_vectorizer_d1()
-                    encoder = load_encoder_d1()
-                    
-                    # Transform and predict
-                    text_vector = vectorizer.transform([cleaned_text])
-                    prediction = model.predict(text_vector)
-                    category = encoder.inverse_transform(prediction)[0]
+                    get_monitor().record_prediction('D1', model_choice, cleaned_text, vectorizer.vocabulary_,
+                                                    prediction, score, cost['latency_ms'])
+                    show_length_notice(cost)
                     
-                    # Format category name
-                    formatted_category = category.replace('_', ' ').title()
-                    category_icon = get_category_icon(formatted_category)
+                    category_icon = category['icon']
                     
                     # Display result with enhanced styling
                     st.markdown(f"""
@@ -479,12 +549,12 @@ def dataset1_page():
                                 PREDICTED CATEGORY
                             </div>
                             <div style="font-size: 26px; font-weight: 800; color: #2196F3;">
-                                {formatted_category}
+                                {category['display_name']}
                             </div>
                             <div style="margin-top: 12px; font-size: 12px; color: #666; padding: 8px;
                                         background: rgba(33, 150, 243, 0.05); border-radius: 8px; backdrop-filter: blur(10px);">
                                 <i class="ri-cpu-line" style="margin-right: 5px; color: #2196F3;"></i>
-                                Model: {model_choice}
+                                Model: {model_choice} · Queue: {category['queue']} · Respond within {category['sla_days']} days
                             </div>
                         </div>
                         <style>
@@ -498,6 +568,8 @@ def dataset1_page():
                         }}
                         </style>
                     """, unsafe_allow_html=True)
+    
+    batch_analysis('D1', model_choice, load_model_d1(model_choice), load_vectorizer_d1(), load_category_table_d1())
 
 def dataset2_page():
     st.markdown("""
@@ -596,6 +668,11 @@ def dataset2_page():
         </div>
     """, unsafe_allow_html=True)
     
+    dataset2_analyzer()
+
+@st.fragment
+def dataset2_analyzer():
+    """Model choice, complaint input and results; reruns on its own, without the page around it"""
     # Model selection with enhanced styling
     st.markdown("""
         <div style="margin-bottom: 10px;">
@@ -643,24 +720,23 @@ def dataset2_page():
             st.error("⚠️ Please enter a complaint before predicting!")
         else:
             with st.spinner("Analyzing complaint..."):
-                # Clean text
-                cleaned_text = clean_text(complaint_text)
+                # Load models
+                model = load_model_d2(model_choice)
+                vectorizer = load_vectorizer_d2()
+                categories = load_category_table_d2()
+                
+                # Clean, transform and predict within the length policy
+                prediction, score, cleaned_text, cost, category = get_executor().submit(
+                    analyze_complaints, 'D2', model_choice, [complaint_text], model, vectorizer, categories).result()[0]
                 
-                if not cleaned_text:
-                    st.warning("⚠️ The complaint text could not be processed. Please enter a more descriptive complaint.")
+                if prediction is None:
+                    get_monitor().record('D2', model_choice, -1, 0.0, 0, 0, cost['latency_ms'])
+                    show_unprocessed_warning(complaint_text)
                 else:
-                    # Load models
-                    model = load_model_d2(model_choice)
-                    vectorizer = load_vectorizer_d2()
-                    encoder = load_encoder_d2()
-                    
-                    # Transform and predict
-                    text_vector = vectorizer.transform([cleaned_text])
-                    prediction = model.predict(text_vector)
-                    category = encoder.inverse_transform(prediction)[0]
-                    
-                    # Get icon for category
-                    category_icon = get_category_icon(category)
+                    get_monitor().record_prediction('D2', model_choice, cleaned_text, vectorizer.vocabulary_,
+                                                    prediction, score, cost['latency_ms'])
+                    show_length_notice(cost)
+                    category_icon = category['icon']
                     
                     # Display result with enhanced styling
                     st.markdown(f"""
@@ -676,12 +752,12 @@ def dataset2_page():
                                 PREDICTED CATEGORY
                             </div>
                             <div style="font-size: 26px; font-weight: 800; color: #2196F3;">
-                                {category}
+                                {category['display_name']}
                             </div>
                             <div style="margin-top: 12px; font-size: 12px; color: #666; padding: 8px;
                                         background: rgba(33, 150, 243, 0.05); border-radius: 8px; backdrop-filter: blur(10px);">
                                 <i class="ri-cpu-line" style="margin-right: 5px; color: #2196F3;"></i>
-                                Model: {model_choice}
+                                Model: {model_choice} · Queue: {category['queue']} · Respond within {category['sla_days']} days
                             </div>
                         </div>
                         <style>
@@ -695,6 +771,8 @@ def dataset2_page():
                         }}
                         </style>
                     """, unsafe_allow_html=True)
+    
+    batch_analysis('D2', model_choice, load_model_d2(model_choice), load_vectorizer_d2(), load_category_table_d2())
 
 def about_page():
     # Metric cards
@@ -843,8 +921,150 @@ def about_page():
         </div>
     """, unsafe_allow_html=True)
 
-def insights_page():
+# Figures reported by the training notebooks, shown until a holdout split is stored
+REPORTED_METRICS = {
+    'D1': {'Logistic Regression': [86.15, 87.17, 86.15, 86.44],
+           'Support Vector Machine': [85.45, 86.48, 85.45, 85.76]},
+    'D2': {'Logistic Regression': [85.54, 85.63, 85.54, 85.57],
+           'Support Vector Machine': [84.80, 84.86, 84.80, 84.82]},
+}
+
+def load_insights(dataset):
+    """Live holdout evaluation of a dataset's models, or None if unavailable"""
+    try:
+        return evaluate_dataset(dataset)
+    except (OSError, ValueError, KeyError) as e:
+        st.warning(f"⚠️ Holdout evaluation failed: {e}")
+        return None
+
+def style_figure(fig, height=280):
+    """Apply the shared chart styling"""
+    fig.update_layout(height=height, margin=dict(l=10, r=10, t=40, b=30),
+                      paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
+                      font=dict(size=11), showlegend=True, legend=dict(orientation='h', yanchor='bottom', y=1.08, xanchor='center', x=0.5),
+                      dragmode=False, hovermode='x unified')
+    fig.update_xaxes(gridcolor='rgba(33, 150, 243, 0.2)', showgrid=True)
+    fig.update_yaxes(gridcolor='rgba(33, 150, 243, 0.2)', showgrid=True)
+    fig.update_layout(xaxis=dict(fixedrange=True), yaxis=dict(fixedrange=True))
+    return fig
+
+def dataset_insights(dataset, title, icon, colors, accent, accent_bg):
+    """Render metrics, confusion matrix and latency for one dataset's models"""
+    import plotly.graph_objects as go
+    
+    with st.spinner(f"Evaluating {title} models on the holdout split..."):
+        results = load_insights(dataset)
+    
+    metric_names = ['Accuracy', 'Precision', 'Recall', 'F1-Score']
+    if results is None:
+        scores = REPORTED_METRICS[dataset]
+    else:
+        scores = {name: [round(result[key] * 100, 2) for key in ('accuracy', 'precision', 'recall', 'f1')]
+                  for name, result in results.items()}
+    best_model = max(scores, key=lambda name: scores[name][0])
+    
+    st.markdown(f"""
+        <div style="background: rgba(255, 255, 255, 0.4); backdrop-filter: blur(20px); 
+                    border-radius: 12px; padding: 12px; margin-bottom: 10px;
+                    border: 2px solid rgba(33, 150, 243, 0.2);
+                    box-shadow: 0 6px 25px rgba(33, 150, 243, 0.1);">
+            <h3 style="color: #2196F3; font-weight: 800; margin: 0 0 12px 0; font-size: 16px;">
+                <i class="{icon}" style="margin-right: 6px;"></i>{title}
+            </h3>
+            <div style="background: {accent_bg}; padding: 10px; border-radius: 8px; margin-bottom: 12px;
+                        border-left: 4px solid {accent};">
+                <div style="font-size: 11px; color: #666; margin-bottom: 4px;">Best Model: {best_model}</div>
+                <div style="font-size: 18px; font-weight: 800; color: {accent};">{scores[best_model][0]:.2f}% Accuracy</div>
+            </div>
+        </div>
+    """, unsafe_allow_html=True)
+    if results is None:
+        st.caption(f"No holdout split found at `{holdout_path(dataset)}`; showing the figures reported in the training notebooks.")
+    else:
+        best = results[best_model]
+        st.caption(f"Evaluated on {best['n_samples']:,} holdout complaints ({best['evaluated_at'][:16].replace('T', ' ')} UTC).")
+    
+    # Model comparison bar chart
+    st.markdown(f"#### Model Comparison - {title}")
+    all_scores = [value for values in scores.values() for value in values]
+    fig = go.Figure(data=[
+        go.Bar(name=name, x=metric_names, y=values, marker_color=color, width=[0.3] * len(metric_names),
+               text=values, texttemplate='%{text:.2f}%', textposition='outside', textfont=dict(size=11))
+        for (name, values), color in zip(scores.items(), colors)
+    ])
+    style_figure(fig).update_layout(barmode='group')
+    fig.update_yaxes(range=[max(0, np.floor(min(all_scores)) - 3), min(100, np.ceil(max(all_scores)) + 2)])
+    st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': False})
+    
+    if results is None:
+        return
+    
+    # Confusion matrix of the best model
+    st.markdown(f"#### Confusion Matrix - {best_model}")
+    labels = [label.replace('_', ' ').title() for label in best['labels']]
+    fig = go.Figure(data=go.Heatmap(z=best['confusion_matrix'], x=labels, y=labels, colorscale='Blues',
+                                    texttemplate='%{z}', textfont=dict(size=10), showscale=False))
+    style_figure(fig, height=320).update_layout(showlegend=False, hovermode='closest')
+    fig.update_xaxes(title_text='Predicted', showgrid=False)
+    fig.update_yaxes(title_text='Actual', showgrid=False, autorange='reversed')
+    st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': False})
+    
+    # Mean per-complaint latency by true class
+    st.markdown(f"#### Latency per Class - {title}")
+    fig = go.Figure(data=[
+        go.Bar(name=name, x=labels, y=[result['per_class'][label]['latency_ms_mean'] for label in result['labels']],
+               marker_color=color, texttemplate='%{y:.2f} ms', textposition='outside', textfont=dict(size=10))
+        for (name, result), color in zip(results.items(), colors)
+    ])
+    style_figure(fig).update_layout(barmode='group')
+    fig.update_yaxes(title_text='ms / complaint')
+    st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': False})
+
+DATASET_COLORS = {'D1': '#4CAF50', 'D2': '#2196F3'}
+
+def monitoring_insights():
+    """Render rolling statistics of the predictions served by this app"""
     import plotly.graph_objects as go
+    
+    st.markdown("#### Live Monitoring")
+    windows = {"Last hour": 3600, "Last 24 hours": 86400, "Last 7 days": 604800}
+    window = st.selectbox("Window", list(windows), key="monitor_window", label_visibility="collapsed")
+    monitor = get_monitor()
+    summary = monitor.summary(windows[window])
+    if summary['count'] == 0:
+        st.caption("No predictions recorded in this window yet.")
+        return
+    
+    cols = st.columns(5)
+    cols[0].metric("Predictions", f"{summary['count']:,}")
+    cols[1].metric("Throughput", f"{summary['throughput_per_min']:.1f}/min")
+    cols[2].metric("OOV Rate", f"{summary['oov_rate'] * 100:.1f}%")
+    cols[3].metric("Empty After Cleaning", f"{summary['empty_rate'] * 100:.1f}%")
+    cols[4].metric("p95 Latency", f"{summary['latency_ms_p95']:.0f} ms")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        # Class mix per dataset
+        tables = {'D1': load_category_table_d1(), 'D2': load_category_table_d2()}
+        fig = go.Figure(data=[
+            go.Bar(name=dataset, x=list(tables[dataset].lookup(list(shares))['display_name']),
+                   y=[share * 100 for share in shares.values()], marker_color=DATASET_COLORS[dataset])
+            for dataset, shares in summary['class_distribution'].items()
+        ])
+        style_figure(fig).update_layout(title=dict(text='Predicted Category Mix (%)', font=dict(size=13)))
+        st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': False})
+    with col2:
+        # OOV drift over time
+        trend = monitor.oov_trend(bucket_seconds=max(windows[window] // 48, 60), window_seconds=windows[window])
+        fig = go.Figure(data=[
+            go.Scatter(name=dataset, x=group['bucket'], y=group['oov_rate'] * 100, mode='lines+markers',
+                       line=dict(color=DATASET_COLORS[dataset]))
+            for dataset, group in trend.groupby('dataset')
+        ])
+        style_figure(fig).update_layout(title=dict(text='Out-of-Vocabulary Rate (%)', font=dict(size=13)))
+        st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': False})
+
+def insights_page():
     st.markdown("""
         <div style="background: rgba(255, 255, 255, 0.4); backdrop-filter: blur(20px); 
                     border-radius: 12px; padding: 12px; margin-bottom: 10px;
@@ -900,80 +1120,17 @@ def insights_page():
     # Wrap content in insights class
     st.markdown('<div class="insights">', unsafe_allow_html=True)
     
-    # Dataset 1 Performance
     col1, col2 = st.columns(2)
     
     with col1:
-        st.markdown("""
-            <div style="background: rgba(255, 255, 255, 0.4); backdrop-filter: blur(20px); 
-                        border-radius: 12px; padding: 12px; margin-bottom: 10px;
-                        border: 2px solid rgba(33, 150, 243, 0.2);
-                        box-shadow: 0 6px 25px rgba(33, 150, 243, 0.1);">
-                <h3 style="color: #2196F3; font-weight: 800; margin: 0 0 12px 0; font-size: 16px;">
-                    <i class="ri-database-2-line" style="margin-right: 6px;"></i>Dataset 1
-                </h3>
-                <div style="background: rgba(76, 175, 80, 0.1); padding: 10px; border-radius: 8px; margin-bottom: 12px;
-                            border-left: 4px solid #4CAF50;">
-                    <div style="font-size: 11px; color: #666; margin-bottom: 4px;">Best Model: Logistic Regression</div>
-                    <div style="font-size: 18px; font-weight: 800; color: #4CAF50;">86.15% Accuracy</div>
-                </div>
-            </div>
-        """, unsafe_allow_html=True)
-        
-        # Create bar chart for Dataset 1
-        st.markdown("#### Model Comparison - Dataset 1")
-        fig1 = go.Figure(data=[
-            go.Bar(name='Logistic Regression', x=['Accuracy', 'Precision', 'Recall', 'F1-Score'], 
-                   y=[86.15, 87.17, 86.15, 86.44], marker_color='#66BB6A', width=[0.3, 0.3, 0.3, 0.3],
-                   text=[86.15, 87.17, 86.15, 86.44], texttemplate='%{text:.2f}%', textposition='outside', textfont=dict(size=11)),
-            go.Bar(name='Support Vector Machine', x=['Accuracy', 'Precision', 'Recall', 'F1-Score'], 
-                   y=[85.45, 86.48, 85.45, 85.76], marker_color='#4CAF50', width=[0.3, 0.3, 0.3, 0.3],
-                   text=[85.45, 86.48, 85.45, 85.76], texttemplate='%{text:.2f}%', textposition='outside', textfont=dict(size=11))
-        ])
-        fig1.update_layout(barmode='group', height=280, margin=dict(l=10, r=10, t=40, b=30),
-                           paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
-                           font=dict(size=11), showlegend=True, legend=dict(orientation='h', yanchor='bottom', y=1.08, xanchor='center', x=0.5),
-                           dragmode=False, hovermode='x unified')
-        fig1.update_xaxes(gridcolor='rgba(33, 150, 243, 0.2)', showgrid=True)
-        fig1.update_yaxes(gridcolor='rgba(33, 150, 243, 0.2)', showgrid=True, range=[82, 90])
-        fig1.update_layout(xaxis=dict(fixedrange=True), yaxis=dict(fixedrange=True))
-        st.plotly_chart(fig1, use_container_width=True, config={'displayModeBar': False})
+        dataset_insights('D1', 'Dataset 1', 'ri-database-2-line', ['#66BB6A', '#4CAF50'],
+                         '#4CAF50', 'rgba(76, 175, 80, 0.1)')
     
     with col2:
-        st.markdown("""
-            <div style="background: rgba(255, 255, 255, 0.4); backdrop-filter: blur(20px); 
-                        border-radius: 12px; padding: 12px; margin-bottom: 10px;
-                        border: 2px solid rgba(33, 150, 243, 0.2);
-                        box-shadow: 0 6px 25px rgba(33, 150, 243, 0.1);">
-                <h3 style="color: #2196F3; font-weight: 800; margin: 0 0 12px 0; font-size: 16px;">
-                    <i class="ri-server-line" style="margin-right: 6px;"></i>Dataset 2
-                </h3>
-                <div style="background: rgba(33, 150, 243, 0.1); padding: 10px; border-radius: 8px; margin-bottom: 12px;
-                            border-left: 4px solid #2196F3;">
-                    <div style="font-size: 11px; color: #666; margin-bottom: 4px;">Best Model: Logistic Regression</div>
-                    <div style="font-size: 18px; font-weight: 800; color: #2196F3;">85.54% Accuracy</div>
-                </div>
-            </div>
-        """, unsafe_allow_html=True)
-        
-        # Create bar chart for Dataset 2
-        st.markdown("#### Model Comparison - Dataset 2")
-        fig2 = go.Figure(data=[
-            go.Bar(name='Logistic Regression', x=['Accuracy', 'Precision', 'Recall', 'F1-Score'], 
-                   y=[85.54, 85.63, 85.54, 85.57], marker_color='#2196F3', width=[0.3, 0.3, 0.3, 0.3],
-                   text=[85.54, 85.63, 85.54, 85.57], texttemplate='%{text:.2f}%', textposition='outside', textfont=dict(size=11)),
-            go.Bar(name='Support Vector Machine', x=['Accuracy', 'Precision', 'Recall', 'F1-Score'], 
-                   y=[84.80, 84.86, 84.80, 84.82], marker_color='#64B5F6', width=[0.3, 0.3, 0.3, 0.3],
-                   text=[84.80, 84.86, 84.80, 84.82], texttemplate='%{text:.2f}%', textposition='outside', textfont=dict(size=11))
-        ])
-        fig2.update_layout(barmode='group', height=280, margin=dict(l=10, r=10, t=40, b=30),
-                           paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
-                           font=dict(size=11), showlegend=True, legend=dict(orientation='h', yanchor='bottom', y=1.08, xanchor='center', x=0.5),
-                           dragmode=False, hovermode='x unified')
-        fig2.update_xaxes(gridcolor='rgba(33, 150, 243, 0.2)', showgrid=True)
-        fig2.update_yaxes(gridcolor='rgba(33, 150, 243, 0.2)', showgrid=True, range=[81, 87])
-        fig2.update_layout(xaxis=dict(fixedrange=True), yaxis=dict(fixedrange=True))
-        st.plotly_chart(fig2, use_container_width=True, config={'displayModeBar': False})
+        dataset_insights('D2', 'Dataset 2', 'ri-server-line', ['#2196F3', '#64B5F6'],
+                         '#2196F3', 'rgba(33, 150, 243, 0.1)')
+    
+    monitoring_insights()
     
     # Close insights div
     st.markdown('</div>', unsafe_allow_html=True)
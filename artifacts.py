@@ -0,0 +1,372 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+import warnings
+from datetime import datetime, timezone
+
+import numpy as np
+from scipy.special import expit, softmax
+
+DATASETS = ('D1', 'D2')
+MODEL_NAMES = ('Logistic Regression', 'Support Vector Machine')
+
+# Hashes, feature counts and classes of the artifacts, written by `python artifacts.py export`
+MANIFEST_PATH = 'artifacts_manifest.json'
+MANIFEST_VERSION = 1
+
+# pickle: joblib files, verified against the manifest when there is one.
+# arrays: the .npz exports, loaded without unpickling.
+# auto: arrays when a manifest lists them, verified pickles otherwise; no manifest is an error.
+FORMATS = ('auto', 'pickle', 'arrays')
+ARTIFACT_FORMAT = os.environ.get('ARTIFACT_FORMAT', 'auto')
+
+class ArtifactIntegrityError(ValueError):
+    """An artifact is missing from the manifest or does not match it"""
+
+def model_path(dataset, model_name):
+    """Path of the pickled classifier for a dataset and model name"""
+    if model_name == 'Logistic Regression':
+        return f'logistic_model_{dataset}.pkl'
+    return f'svm_model_{dataset}.pkl'
+
+def vectorizer_path(dataset):
+    """Path of the pickled TF-IDF vectorizer for a dataset"""
+    return f'tfidf_vectorizer_{dataset}.pkl'
+
+def encoder_path(dataset):
+    """Path of the pickled label encoder for a dataset"""
+    return f'label_encoder_{dataset}.pkl'
+
+def arrays_path(path):
+    """Path of the array export of a pickled artifact"""
+    return os.path.splitext(path)[0] + '.npz'
+
+def file_hash(path):
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def artifact_hash(dataset, model_name, artifact_format=None):
+    """Combined hash of the model, vectorizer and encoder files a prediction is loaded from"""
+    digest = hashlib.sha256()
+    for path in (model_path(dataset, model_name), vectorizer_path(dataset), encoder_path(dataset)):
+        digest.update(file_hash(_select(path, artifact_format)[2]).encode())
+    return digest.hexdigest()
+
+# Linear models rebuilt from arrays
+
+class LinearModel:
+    """Linear classifier with the decision_function and predict of the sklearn model it was exported from"""
+
+    def __init__(self, coef, intercept, classes):
+        self.coef_ = coef
+        self.intercept_ = intercept
+        self.classes_ = classes
+        self.n_features_in_ = coef.shape[1]
+
+    def decision_function(self, X):
+        scores = X @ self.coef_.T + self.intercept_
+        return scores.ravel() if scores.shape[1] == 1 else scores
+
+    def predict(self, X):
+        scores = self.decision_function(X)
+        best = (scores > 0).astype(int) if scores.ndim == 1 else scores.argmax(axis=1)
+        return self.classes_[best]
+
+class LogisticModel(LinearModel):
+    """LinearModel with LogisticRegression's predict_proba, multinomial or one-vs-rest"""
+
+    def __init__(self, coef, intercept, classes, multinomial):
+        super().__init__(coef, intercept, classes)
+        self.multinomial = multinomial
+
+    def predict_proba(self, X):
+        scores = self.decision_function(X)
+        if self.multinomial:
+            return softmax(np.c_[-scores, scores] if scores.ndim == 1 else scores, axis=1)
+        probabilities = expit(scores)
+        if probabilities.ndim == 1:
+            return np.c_[1 - probabilities, probabilities]
+        return probabilities / probabilities.sum(axis=1, keepdims=True)
+
+def _is_multinomial(model):
+    """Whether a fitted LogisticRegression turns decision values into probabilities with softmax"""
+    X = np.random.default_rng(0).random((8, model.coef_.shape[1])) * 0.1
+    scores = model.decision_function(X)
+    if scores.ndim == 1:
+        scores = np.c_[-scores, scores]
+    return np.allclose(model.predict_proba(X), softmax(scores, axis=1))
+
+# Array exports
+
+def _save_arrays(path, **arrays):
+    with open(path, 'wb') as f:
+        np.savez(f, **arrays)
+
+def _export_vectorizer(vectorizer, path):
+    params = {key: value for key, value in vectorizer.get_params().items() if key != 'vocabulary'}
+    for key in ('analyzer', 'preprocessor', 'tokenizer'):
+        if callable(params[key]):
+            raise ValueError(f'Cannot export a vectorizer with a custom {key}')
+    params['dtype'] = np.dtype(params['dtype']).name
+    terms = [''] * len(vectorizer.vocabulary_)
+    for term, column in vectorizer.vocabulary_.items():
+        terms[column] = term
+    # Newline-joined UTF-8 is far smaller than a fixed-width string array; n-grams never contain newlines
+    _save_arrays(path, terms=np.frombuffer('\n'.join(terms).encode(), dtype=np.uint8), idf=vectorizer.idf_,
+                 params=np.array(json.dumps(params)))
+
+def _export_model(model, path):
+    kind = 'linear'
+    if hasattr(model, 'predict_proba'):
+        kind = 'multinomial' if _is_multinomial(model) else 'ovr'
+    _save_arrays(path, coef=model.coef_, intercept=np.atleast_1d(model.intercept_), classes=model.classes_,
+                 kind=np.array(kind))
+
+def _export_encoder(encoder, path):
+    _save_arrays(path, classes=np.asarray(encoder.classes_).astype(str))
+
+def _load_vectorizer_arrays(path):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    with np.load(path, allow_pickle=False) as arrays:
+        params = json.loads(str(arrays['params']))
+        params['dtype'] = np.dtype(params['dtype']).type
+        params['ngram_range'] = tuple(params['ngram_range'])
+        vocabulary = {term: column for column, term in enumerate(arrays['terms'].tobytes().decode().split('\n'))}
+        vectorizer = TfidfVectorizer(vocabulary=vocabulary, **params)
+        vectorizer.idf_ = arrays['idf']
+    return vectorizer
+
+def _load_model_arrays(path):
+    with np.load(path, allow_pickle=False) as arrays:
+        kind = str(arrays['kind'])
+        coef, intercept, classes = arrays['coef'], arrays['intercept'], arrays['classes']
+    if kind == 'linear':
+        return LinearModel(coef, intercept, classes)
+    return LogisticModel(coef, intercept, classes, multinomial=kind == 'multinomial')
+
+def _load_encoder_arrays(path):
+    from sklearn.preprocessing import LabelEncoder
+
+    encoder = LabelEncoder()
+    with np.load(path, allow_pickle=False) as arrays:
+        encoder.classes_ = arrays['classes']
+    return encoder
+
+# Manifest
+
+def _load_pickle(path):
+    """Unpickle an artifact, also returning the sklearn version it was saved with"""
+    import joblib
+    import sklearn
+    from sklearn.exceptions import InconsistentVersionWarning
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always', InconsistentVersionWarning)
+        artifact = joblib.load(path)
+    versions = [w.message.original_sklearn_version for w in caught
+                if issubclass(w.category, InconsistentVersionWarning)]
+    return artifact, versions[0] if versions else sklearn.__version__
+
+def read_manifest(path=None):
+    """The artifact manifest, or None if none has been exported"""
+    path = path or MANIFEST_PATH
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def export_artifacts(datasets=DATASETS, model_names=MODEL_NAMES, manifest_path=None):
+    """Write the array export of every pickled artifact and a manifest describing both"""
+    manifest = {'manifest_version': MANIFEST_VERSION, 'created_at': datetime.now(timezone.utc).isoformat(),
+                'datasets': {}}
+    sklearn_versions = set()
+    for dataset in datasets:
+        exports = [(vectorizer_path(dataset), _export_vectorizer), (encoder_path(dataset), _export_encoder)]
+        exports += [(model_path(dataset, model_name), _export_model) for model_name in model_names]
+        entry = {'files': {}}
+        for path, export in exports:
+            artifact, version = _load_pickle(path)
+            sklearn_versions.add(version)
+            export(artifact, arrays_path(path))
+            entry['files'][path] = file_hash(path)
+            entry['files'][arrays_path(path)] = file_hash(arrays_path(path))
+            if export is _export_vectorizer:
+                entry['n_features'] = len(artifact.vocabulary_)
+            elif export is _export_encoder:
+                entry['classes'] = [str(label) for label in artifact.classes_]
+        manifest['datasets'][dataset] = entry
+    manifest['sklearn_version'] = ', '.join(sorted(sklearn_versions))
+
+    with open(manifest_path or MANIFEST_PATH, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+def _verify_file(manifest, dataset, path):
+    expected = manifest['datasets'].get(dataset, {}).get('files', {}).get(path)
+    if expected is None:
+        raise ArtifactIntegrityError(f'{path} is not listed in {MANIFEST_PATH}')
+    if file_hash(path) != expected:
+        raise ArtifactIntegrityError(f'{path} does not match the hash in {MANIFEST_PATH}')
+
+def _verify_shape(manifest, dataset, n_features=None, n_classes=None, path=''):
+    entry = manifest['datasets'][dataset]
+    if n_features is not None and n_features != entry['n_features']:
+        raise ArtifactIntegrityError(f"{path} has {n_features} features, the manifest says {entry['n_features']}")
+    if n_classes is not None and n_classes != len(entry['classes']):
+        raise ArtifactIntegrityError(f"{path} has {n_classes} classes, the manifest says {len(entry['classes'])}")
+
+def _select(path, artifact_format):
+    """Manifest (or None), format and file to load for a pickled artifact path, before verification"""
+    artifact_format = artifact_format or ARTIFACT_FORMAT
+    if artifact_format not in FORMATS:
+        raise ValueError(f'Unknown artifact format: {artifact_format}')
+    manifest = read_manifest()
+    if manifest is None and artifact_format != 'pickle':
+        raise ArtifactIntegrityError(f'{MANIFEST_PATH} not found; run `python artifacts.py export`, '
+                                     'or set ARTIFACT_FORMAT=pickle to load unverified pickles')
+    if artifact_format == 'auto':
+        artifact_format = 'arrays' if os.path.exists(arrays_path(path)) else 'pickle'
+    if artifact_format == 'arrays':
+        path = arrays_path(path)
+    return manifest, artifact_format, path
+
+def _resolve(path, dataset, artifact_format):
+    """Manifest (or None), format and file to load for a pickled artifact path, verified against the manifest"""
+    manifest, artifact_format, path = _select(path, artifact_format)
+    if manifest is not None:
+        _verify_file(manifest, dataset, path)
+        if artifact_format == 'pickle':
+            import sklearn
+            if sklearn.__version__ not in manifest['sklearn_version'].split(', '):
+                warnings.warn(f"{path} was saved with scikit-learn {manifest['sklearn_version']}, "
+                              f"running {sklearn.__version__}; consider ARTIFACT_FORMAT=arrays")
+    return manifest, artifact_format, path
+
+# Loaders
+
+def _unpickle(path):
+    # joblib is imported only when pickles are used; it adds to every cold start otherwise
+    import joblib
+    return joblib.load(path)
+
+def load_model(dataset, model_name, artifact_format=None):
+    """Load a trained classifier"""
+    manifest, artifact_format, path = _resolve(model_path(dataset, model_name), dataset, artifact_format)
+    model = _load_model_arrays(path) if artifact_format == 'arrays' else _unpickle(path)
+    if manifest is not None:
+        _verify_shape(manifest, dataset, model.coef_.shape[1], len(model.classes_), path)
+    return model
+
+def load_vectorizer(dataset, artifact_format=None):
+    """Load a fitted TF-IDF vectorizer"""
+    manifest, artifact_format, path = _resolve(vectorizer_path(dataset), dataset, artifact_format)
+    vectorizer = _load_vectorizer_arrays(path) if artifact_format == 'arrays' else _unpickle(path)
+    if manifest is not None:
+        _verify_shape(manifest, dataset, n_features=len(vectorizer.vocabulary_), path=path)
+    return vectorizer
+
+def load_encoder(dataset, artifact_format=None):
+    """Load a fitted label encoder"""
+    manifest, artifact_format, path = _resolve(encoder_path(dataset), dataset, artifact_format)
+    encoder = _load_encoder_arrays(path) if artifact_format == 'arrays' else _unpickle(path)
+    if manifest is not None and [str(label) for label in encoder.classes_] != manifest['datasets'][dataset]['classes']:
+        raise ArtifactIntegrityError(f'{path} classes do not match {MANIFEST_PATH}')
+    return encoder
+
+def verify_artifacts(datasets=DATASETS, model_names=MODEL_NAMES):
+    """Load every artifact both ways, raising ArtifactIntegrityError on any manifest mismatch"""
+    for dataset in datasets:
+        for artifact_format in ('pickle', 'arrays'):
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                load_vectorizer(dataset, artifact_format)
+                load_encoder(dataset, artifact_format)
+                for model_name in model_names:
+                    load_model(dataset, model_name, artifact_format)
+
+def _load_all(datasets, model_names, artifact_format):
+    loaded = {}
+    for dataset in datasets:
+        loaded[dataset] = (load_vectorizer(dataset, artifact_format), load_encoder(dataset, artifact_format),
+                           {model_name: load_model(dataset, model_name, artifact_format) for model_name in model_names})
+    return loaded
+
+def _cold_load_seconds(datasets, model_names, artifact_format):
+    """Seconds a fresh interpreter takes to import this module and load every artifact"""
+    import subprocess
+
+    code = ('import time, warnings; warnings.simplefilter("ignore"); start = time.perf_counter(); '
+            f'import artifacts; artifacts._load_all({list(datasets)!r}, {list(model_names)!r}, {artifact_format!r}); '
+            'print(time.perf_counter() - start)')
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [os.path.dirname(os.path.abspath(__file__)),
+                                                                     os.environ.get('PYTHONPATH')])))
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True, env=env)
+    return float(result.stdout.strip().splitlines()[-1])
+
+def benchmark_loading(datasets=DATASETS, model_names=MODEL_NAMES, repeats=5, documents=200):
+    """Load times per format, cold (fresh process) and warm (best of ``repeats``),
+    and the largest score difference between the two formats"""
+    from inference import class_scores
+
+    timings = {f'{artifact_format}_cold_seconds': _cold_load_seconds(datasets, model_names, artifact_format)
+               for artifact_format in ('pickle', 'arrays')}
+    loaded = {}
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        for artifact_format in ('pickle', 'arrays'):
+            best = float('inf')
+            for _ in range(repeats):
+                start = time.perf_counter()
+                loaded[artifact_format] = _load_all(datasets, model_names, artifact_format)
+                best = min(best, time.perf_counter() - start)
+            timings[f'{artifact_format}_seconds'] = best
+
+    rng = np.random.default_rng(0)
+    difference = 0.0
+    for dataset in datasets:
+        pickled_vectorizer, _, pickled_models = loaded['pickle'][dataset]
+        array_vectorizer, _, array_models = loaded['arrays'][dataset]
+        terms = list(pickled_vectorizer.vocabulary_)
+        texts = [' '.join(rng.choice(terms, 40)) for _ in range(documents)]
+        X_pickle, X_arrays = pickled_vectorizer.transform(texts), array_vectorizer.transform(texts)
+        difference = max(difference, abs(X_pickle - X_arrays).max())
+        for model_name in model_names:
+            scores = class_scores(pickled_models[model_name], X_pickle)
+            difference = max(difference, np.abs(scores - class_scores(array_models[model_name], X_arrays)).max())
+    return {**timings, 'max_difference': difference}
+
+def main():
+    parser = argparse.ArgumentParser(description='Export, verify and benchmark the model artifacts')
+    parser.add_argument('command', choices=['export', 'verify', 'benchmark'])
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        manifest = export_artifacts()
+        print(f"Exported arrays and wrote {MANIFEST_PATH} (scikit-learn {manifest['sklearn_version']})")
+        return 0
+    try:
+        verify_artifacts()
+    except (OSError, ValueError) as e:
+        print(f'error: {e}', file=sys.stderr)
+        return 1
+    if args.command == 'verify':
+        print(f'All artifacts match {MANIFEST_PATH}')
+        return 0
+    result = benchmark_loading()
+    for label, suffix in (('cold start', '_cold_seconds'), ('warm', '_seconds')):
+        pickle_seconds, arrays_seconds = result[f'pickle{suffix}'], result[f'arrays{suffix}']
+        print(f'{label}: pickle {pickle_seconds * 1000:.1f} ms, arrays {arrays_seconds * 1000:.1f} ms '
+              f'({pickle_seconds / arrays_seconds:.1f}x faster)')
+    print(f"Largest score difference between formats: {result['max_difference']:.2g}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,106 @@
+import json
+import os
+import re
+
+import numpy as np
+
+from artifacts import load_encoder
+
+ROUTING_FILE = os.environ.get('CATEGORY_ROUTING_FILE', 'category_routing.json')
+
+# Companies are expected to respond to CFPB complaints within 15 days
+DEFAULT_SLA_DAYS = 15
+
+COLUMNS = ('category', 'display_name', 'icon', 'queue', 'sla_days')
+OVERRIDABLE = ('display_name', 'icon', 'queue', 'sla_days')
+
+ICON_MAPPING = {
+    'credit card': 'ri-bank-card-line',
+    'retail banking': 'ri-store-3-line',
+    'credit report': 'ri-bar-chart-line',
+    'credit reporting': 'ri-bar-chart-line',
+    'mortgages': 'ri-home-line',
+    'mortgages & loans': 'ri-home-line',
+    'mortgage': 'ri-home-line',
+    'debt collection': 'ri-phone-line',
+    'loan': 'ri-money-dollar-circle-line',
+    'bank account': 'ri-bank-line'
+}
+DEFAULT_ICON = 'ri-checkbox-circle-fill'
+
+def category_icon(category_name):
+    """Icon class for a category name, matched exactly or by partial name"""
+    normalized_name = category_name.lower().replace('_', ' ').strip()
+    if normalized_name in ICON_MAPPING:
+        return ICON_MAPPING[normalized_name]
+    for key in ICON_MAPPING:
+        if key in normalized_name or normalized_name in key:
+            return ICON_MAPPING[key]
+    return DEFAULT_ICON
+
+def display_name(category):
+    """Label as shown to users: D1's snake_case labels are title-cased, D2's are kept"""
+    return category.replace('_', ' ').title() if '_' in category else category
+
+def queue_name(category):
+    """Default routing queue for a label, e.g. 'Credit card' -> 'credit-card'"""
+    return re.sub(r'[^a-z0-9]+', '-', category.lower()).strip('-')
+
+def load_routing(path=None):
+    """Routing overrides per dataset and label from a JSON file; empty if the file is missing
+
+    The file maps dataset -> label -> any of display_name, icon, queue and sla_days.
+    """
+    path = path or ROUTING_FILE
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+class CategoryTable:
+    """Display name, icon, routing queue and SLA of each class, indexed by encoded label
+
+    Built once per label encoder so that decoding predictions is a single
+    array index rather than inverse_transform plus string handling per row.
+    """
+
+    def __init__(self, dataset, labels, routing=None):
+        self.dataset = dataset
+        overrides = (routing or {}).get(dataset, {})
+        unknown = set(overrides) - set(labels)
+        if unknown:
+            raise ValueError(f'Routing for unknown {dataset} categories: {", ".join(sorted(unknown))}')
+
+        rows = []
+        for label in labels:
+            row = {'category': label, 'display_name': display_name(label), 'icon': None,
+                   'queue': queue_name(label), 'sla_days': DEFAULT_SLA_DAYS}
+            fields = overrides.get(label, {})
+            invalid = set(fields) - set(OVERRIDABLE)
+            if invalid:
+                raise ValueError(f'Unknown routing fields for {dataset} {label}: {", ".join(sorted(invalid))}')
+            row.update(fields)
+            row['icon'] = row['icon'] or category_icon(label)
+            rows.append(row)
+        self.columns = {column: np.array([row[column] for row in rows], dtype=object) for column in COLUMNS}
+
+    def __len__(self):
+        return len(self.columns['category'])
+
+    def lookup(self, indices):
+        """Dict of column arrays for an array of encoded class indices"""
+        indices = np.asarray(indices, dtype=np.intp)
+        return {column: values[indices] for column, values in self.columns.items()}
+
+    def records(self, indices):
+        """One dict per encoded class index, e.g. for JSON output"""
+        looked_up = self.lookup(indices)
+        return [dict(zip(COLUMNS, values)) for values in zip(*(looked_up[column] for column in COLUMNS))]
+
+def build_category_table(dataset, encoder, routing=None):
+    """Category table for a fitted label encoder"""
+    return CategoryTable(dataset, [str(label) for label in encoder.classes_], routing)
+
+def load_category_table(dataset, routing_path=None):
+    """Category table for a dataset's saved label encoder and the routing file"""
+    return build_category_table(dataset, load_encoder(dataset), load_routing(routing_path))
@@ -0,0 +1,211 @@
+"""Classify complaints from JSONL/CSV files or stdin into JSONL on stdout
+
+    cat complaints.jsonl | python classify.py --dataset D1 > results.jsonl
+    python classify.py --dataset D2 --model svm --workers 4 complaints.csv
+
+Exit status: 0 on success, 1 if some input rows could not be read,
+2 if the run failed (unreadable files, missing artifacts or artifacts
+that do not match the manifest, invalid length policy or routing settings).
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from artifacts import DATASETS
+
+MODEL_CHOICES = {'lr': 'Logistic Regression', 'svm': 'Support Vector Machine'}
+
+# Artifacts of the current run, loaded once per process
+_pipeline = {}
+
+def _load_pipeline(dataset, model_name):
+    from artifacts import load_model, load_vectorizer
+    from categories import load_category_table
+    from inference import LengthPolicy
+
+    _pipeline.update(
+        dataset=dataset,
+        model_name=model_name,
+        model=load_model(dataset, model_name),
+        vectorizer=load_vectorizer(dataset),
+        categories=load_category_table(dataset),
+        policy=LengthPolicy.from_env(),
+    )
+
+def _classify(batch):
+    """Result records for a batch of (id, text) pairs"""
+    from inference import classify_batch
+    from tracing import span, trace_request
+
+    ids, texts = zip(*batch)
+    with trace_request('classify', dataset=_pipeline['dataset'], model=_pipeline['model_name'], rows=len(texts)):
+        results = classify_batch(texts, _pipeline['model'], _pipeline['vectorizer'], _pipeline['policy'])
+        predicted = [prediction for prediction, _, _, _ in results if prediction is not None]
+        with span('category_lookup'):
+            categories = iter(_pipeline['categories'].records(predicted))
+
+    records = []
+    for complaint_id, (prediction, score, _, cost) in zip(ids, results):
+        record = {'id': complaint_id, 'dataset': _pipeline['dataset'], 'model': _pipeline['model_name']}
+        if prediction is None:
+            record.update(status='empty', category=None, display_name=None, queue=None, sla_days=None, score=None)
+        else:
+            category = next(categories)
+            record.update(status='ok', category=category['category'], display_name=category['display_name'],
+                          queue=category['queue'], sla_days=category['sla_days'], score=score)
+        record.update(chunks=cost['chunks'], truncated=cost['truncated'])
+        records.append(record)
+    return records
+
+def _open_inputs(paths):
+    """Text streams for the given paths, '-' meaning stdin"""
+    for path in paths or ['-']:
+        if path == '-':
+            yield path, sys.stdin
+        else:
+            with open(path, encoding='utf-8', newline='') as f:
+                yield path, f
+
+def _detect_format(path, stream):
+    """'jsonl' or 'csv' from the file extension, or by peeking at the first line"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.jsonl', '.json', '.ndjson'):
+        return 'jsonl', stream
+    if extension == '.csv':
+        return 'csv', stream
+    first_line = stream.readline()
+    stream = itertools.chain([first_line], stream)
+    return ('jsonl' if first_line.lstrip().startswith('{') else 'csv'), stream
+
+def read_rows(paths, input_format, text_field, id_field, errors):
+    """Yield (id, text) pairs; unreadable rows are reported to stderr and counted in ``errors``"""
+    row_number = 0
+    for path, stream in _open_inputs(paths):
+        fmt = input_format
+        if fmt == 'auto':
+            fmt, stream = _detect_format(path, stream)
+        rows = csv.DictReader(stream) if fmt == 'csv' else stream
+        for line_number, row in enumerate(rows, start=1):
+            if fmt == 'jsonl':
+                if not row.strip():
+                    continue
+                try:
+                    row = json.loads(row)
+                except ValueError as e:
+                    errors.append(1)
+                    print(f'{path}:{line_number}: invalid JSON: {e}', file=sys.stderr)
+                    continue
+            if not isinstance(row, dict) or text_field not in row:
+                errors.append(1)
+                print(f"{path}:{line_number}: missing field '{text_field}'", file=sys.stderr)
+                continue
+            row_number += 1
+            yield row.get(id_field, row_number), row[text_field]
+
+def _batches(rows, batch_size):
+    iterator = iter(rows)
+    while True:
+        batch = list(itertools.islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+def run(rows, dataset, model_name, batch_size, workers, output, store=None):
+    """Classify rows in batches, writing JSONL in input order; returns the number of rows"""
+    written = 0
+
+    def emit(records):
+        nonlocal written
+        for record in records:
+            output.write(json.dumps(record) + '\n')
+        output.flush()
+        if store is not None:
+            scored = [r for r in records if r['status'] == 'ok']
+            if scored:
+                store.append(dataset, model_name, None, [r['category'] for r in scored],
+                             [r['score'] for r in scored], complaint_ids=[r['id'] for r in scored])
+        written += len(records)
+
+    # Load in this process first (main already has) so broken artifacts are
+    # reported here rather than as workers dying in their initializer
+    if (_pipeline.get('dataset'), _pipeline.get('model_name')) != (dataset, model_name):
+        _load_pipeline(dataset, model_name)
+    if workers <= 1:
+        for batch in _batches(rows, batch_size):
+            emit(_classify(batch))
+        return written
+
+    # Keep a bounded number of batches in flight so memory stays flat on long streams
+    with ProcessPoolExecutor(max_workers=workers, initializer=_load_pipeline,
+                             initargs=(dataset, model_name)) as executor:
+        pending = deque()
+        for batch in _batches(rows, batch_size):
+            pending.append(executor.submit(_classify, batch))
+            if len(pending) >= workers * 2:
+                emit(pending.popleft().result())
+        while pending:
+            emit(pending.popleft().result())
+    return written
+
+def _positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f'must be at least 1, got {number}')
+    return number
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Classify complaints from JSONL or CSV into JSONL results')
+    parser.add_argument('inputs', nargs='*', help="input files ('-' or none for stdin)")
+    parser.add_argument('--dataset', choices=DATASETS, default='D1')
+    parser.add_argument('--model', choices=sorted(MODEL_CHOICES), default='lr')
+    parser.add_argument('--format', choices=['auto', 'jsonl', 'csv'], default='auto')
+    parser.add_argument('--text-field', default='complaints')
+    parser.add_argument('--id-field', default='id')
+    parser.add_argument('--batch-size', type=_positive_int, default=512)
+    parser.add_argument('--workers', type=_positive_int, default=1)
+    parser.add_argument('--store', help='also append scored rows to this results database')
+    args = parser.parse_args(argv)
+
+    model_name = MODEL_CHOICES[args.model]
+    try:
+        _load_pipeline(args.dataset, model_name)
+    except (OSError, ValueError) as e:
+        # Missing or mismatched artifacts, or a bad length policy or routing file
+        print(f'error: {e}', file=sys.stderr)
+        return 2
+
+    store = None
+    if args.store:
+        from results_store import ResultsStore
+        store = ResultsStore(args.store)
+
+    errors = []
+    start = time.perf_counter()
+    try:
+        rows = read_rows(args.inputs, args.format, args.text_field, args.id_field, errors)
+        written = run(rows, args.dataset, model_name, args.batch_size, args.workers, sys.stdout, store)
+    except BrokenPipeError:
+        # The reader went away (e.g. piped into head); stop quietly
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    except (OSError, BrokenProcessPool) as e:
+        print(f'error: {e}', file=sys.stderr)
+        return 2
+    finally:
+        if store is not None:
+            store.close()
+    seconds = time.perf_counter() - start
+
+    print(f'{written} rows in {seconds:.2f}s ({written / seconds if seconds else 0:.1f} rows/s), '
+          f'{len(errors)} unreadable', file=sys.stderr)
+    return 1 if errors else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
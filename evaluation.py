@@ -0,0 +1,166 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score, confusion_matrix, precision_recall_fscore_support
+
+from artifacts import DATASETS, MODEL_NAMES, artifact_hash, file_hash, load_encoder, load_model, load_vectorizer
+from preprocessing import clean_text, preprocessing_fingerprint
+
+CACHE_DIR = '.eval_cache'
+EVAL_VERSION = 1
+
+def holdout_path(dataset):
+    """Path of the stored holdout split for a dataset"""
+    return f'holdout_{dataset}.csv.gz'
+
+def save_holdout(complaints, labels, dataset):
+    """Store the raw complaint text and product label of a holdout split"""
+    frame = pd.DataFrame({'complaints': list(complaints), 'product': list(labels)})
+    frame.to_csv(holdout_path(dataset), index=False, compression='gzip')
+
+def has_holdout(dataset):
+    """Whether a holdout split has been stored for a dataset"""
+    return os.path.exists(holdout_path(dataset))
+
+def cache_key(dataset, model_name):
+    """Key identifying an evaluation of the current artifacts and cleaning settings on the current holdout"""
+    digest = hashlib.sha256()
+    digest.update(f'{EVAL_VERSION}:{dataset}:{model_name}'.encode())
+    digest.update(artifact_hash(dataset, model_name).encode())
+    digest.update(file_hash(holdout_path(dataset)).encode())
+    # Cleaning settings (e.g. PREPROCESSING_PROFILE) change the texts the model sees
+    digest.update(preprocessing_fingerprint().encode())
+    return digest.hexdigest()
+
+def _cache_file(key):
+    return os.path.join(CACHE_DIR, f'{key}.json')
+
+def _read_cache(key):
+    try:
+        with open(_cache_file(key), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write_cache(key, result):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = _cache_file(key) + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(result, f)
+    os.replace(tmp_path, _cache_file(key))
+
+# Holds as many splits as there are datasets; a rewritten holdout gets a new hash,
+# so its old version is evicted instead of kept for the life of the process
+@lru_cache(maxsize=len(DATASETS))
+def _clean_holdout_version(dataset, holdout_hash):
+    """Clean one version of a holdout split, timing each row"""
+    frame = pd.read_csv(holdout_path(dataset))
+    cleaned = []
+    clean_seconds = np.empty(len(frame))
+    for i, text in enumerate(frame['complaints']):
+        start = time.perf_counter()
+        cleaned.append(clean_text(text))
+        clean_seconds[i] = time.perf_counter() - start
+    return frame['product'].astype(str).to_numpy(), cleaned, clean_seconds
+
+def _clean_holdout(dataset):
+    """Cleaned holdout split, shared by every model evaluated on the same version of it"""
+    return _clean_holdout_version(dataset, file_hash(holdout_path(dataset)))
+
+def evaluate(dataset, model_name, batch_size=2048, use_cache=True):
+    """Evaluate the currently stored artifacts of one model on the dataset's holdout split"""
+    key = cache_key(dataset, model_name)
+    if use_cache:
+        cached = _read_cache(key)
+        if cached is not None:
+            return cached
+
+    labels, cleaned, clean_seconds = _clean_holdout(dataset)
+    model = load_model(dataset, model_name)
+    vectorizer = load_vectorizer(dataset)
+    encoder = load_encoder(dataset)
+
+    # Rows whose label the encoder has never seen cannot be scored
+    classes = [str(c) for c in encoder.classes_]
+    known = np.isin(labels, classes)
+    y_true = encoder.transform(labels[known])
+    texts = [text for text, keep in zip(cleaned, known) if keep]
+    row_seconds = clean_seconds[known].copy()
+
+    # Vectorize and predict in batches, spreading each batch's cost over its rows
+    y_pred = np.empty(len(texts), dtype=y_true.dtype)
+    for start in range(0, len(texts), batch_size):
+        stop = min(start + batch_size, len(texts))
+        batch_start = time.perf_counter()
+        y_pred[start:stop] = model.predict(vectorizer.transform(texts[start:stop]))
+        row_seconds[start:stop] += (time.perf_counter() - batch_start) / (stop - start)
+
+    class_ids = np.arange(len(classes))
+    precision, recall, f1, _ = precision_recall_fscore_support(y_true, y_pred, average='weighted', zero_division=0)
+    class_precision, class_recall, class_f1, support = precision_recall_fscore_support(
+        y_true, y_pred, labels=class_ids, zero_division=0
+    )
+    row_ms = row_seconds * 1000
+    per_class = {}
+    for i, label in enumerate(classes):
+        class_ms = row_ms[y_true == i]
+        per_class[label] = {
+            'precision': float(class_precision[i]),
+            'recall': float(class_recall[i]),
+            'f1': float(class_f1[i]),
+            'support': int(support[i]),
+            'latency_ms_mean': float(class_ms.mean()) if len(class_ms) else 0.0,
+            'latency_ms_p95': float(np.percentile(class_ms, 95)) if len(class_ms) else 0.0,
+        }
+
+    result = {
+        'dataset': dataset,
+        'model': model_name,
+        'cache_key': key,
+        'evaluated_at': datetime.now(timezone.utc).isoformat(),
+        'n_samples': int(len(texts)),
+        'n_unknown_labels': int((~known).sum()),
+        'n_empty_after_cleaning': int(sum(1 for text in texts if not text)),
+        'accuracy': float(accuracy_score(y_true, y_pred)),
+        'precision': float(precision),
+        'recall': float(recall),
+        'f1': float(f1),
+        'latency_ms_mean': float(row_ms.mean()) if len(row_ms) else 0.0,
+        'labels': classes,
+        'per_class': per_class,
+        'confusion_matrix': confusion_matrix(y_true, y_pred, labels=class_ids).tolist(),
+    }
+    _write_cache(key, result)
+    return result
+
+def evaluate_dataset(dataset, use_cache=True):
+    """Evaluate every model of a dataset, or return None if no holdout split is stored"""
+    if not has_holdout(dataset):
+        return None
+    return {model_name: evaluate(dataset, model_name, use_cache=use_cache) for model_name in MODEL_NAMES}
+
+def main():
+    parser = argparse.ArgumentParser(description='Evaluate the stored models on their holdout splits')
+    parser.add_argument('datasets', nargs='*', default=list(DATASETS), choices=DATASETS)
+    parser.add_argument('--no-cache', action='store_true', help='re-run even if a cached result exists')
+    args = parser.parse_args()
+
+    for dataset in args.datasets:
+        results = evaluate_dataset(dataset, use_cache=not args.no_cache)
+        if results is None:
+            print(f'{dataset}: no holdout split at {holdout_path(dataset)}')
+            continue
+        for model_name, result in results.items():
+            print(f"{dataset} {model_name}: accuracy={result['accuracy']:.4f} precision={result['precision']:.4f} "
+                  f"recall={result['recall']:.4f} f1={result['f1']:.4f} "
+                  f"latency={result['latency_ms_mean']:.2f}ms n={result['n_samples']}")
+
+if __name__ == '__main__':
+    main()
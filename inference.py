@@ -0,0 +1,135 @@
+import os
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from preprocessing import clean_text
+from tracing import span
+
+LENGTH_MODES = ('chunk', 'truncate', 'none')
+
+def class_scores(model, text_vectors):
+    """Per-class probabilities, or decision margins for models without them"""
+    if hasattr(model, 'predict_proba'):
+        return model.predict_proba(text_vectors)
+    return model.decision_function(text_vectors)
+
+@dataclass(frozen=True)
+class LengthPolicy:
+    """How much of a complaint is processed
+
+    ``truncate`` keeps the first ``max_chars`` characters. ``chunk`` splits
+    the first ``chunk_chars * max_chunks`` characters into chunks that are
+    vectorized and scored in one batch, then combined by a vote weighted by
+    each chunk's number of in-vocabulary n-grams. Either way the work per
+    complaint is bounded no matter how much text is pasted. ``none`` scores
+    the whole text. Chunks are large enough that ordinary complaints are
+    scored in one piece, the same way evaluation scores the holdout.
+    """
+    mode: str = 'chunk'
+    max_chars: int = 10000
+    chunk_chars: int = 10000
+    max_chunks: int = 4
+
+    def __post_init__(self):
+        if self.mode not in LENGTH_MODES:
+            raise ValueError(f"Unknown length mode {self.mode!r}, expected one of {', '.join(LENGTH_MODES)}")
+        for name in ('max_chars', 'chunk_chars', 'max_chunks'):
+            value = getattr(self, name)
+            if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+                raise ValueError(f'{name} must be a positive integer, got {value!r}')
+
+    @classmethod
+    def from_env(cls):
+        """Policy from COMPLAINT_LENGTH_MODE / _MAX_CHARS / _CHUNK_CHARS / _MAX_CHUNKS"""
+        defaults = cls()
+        return cls(
+            mode=os.environ.get('COMPLAINT_LENGTH_MODE', defaults.mode),
+            max_chars=int(os.environ.get('COMPLAINT_MAX_CHARS', defaults.max_chars)),
+            chunk_chars=int(os.environ.get('COMPLAINT_CHUNK_CHARS', defaults.chunk_chars)),
+            max_chunks=int(os.environ.get('COMPLAINT_MAX_CHUNKS', defaults.max_chunks)),
+        )
+
+def _cut(text, limit):
+    """Up to ``limit`` characters of text, backing off to the last whitespace"""
+    if len(text) <= limit:
+        return text
+    cut = text.rfind(' ', 0, limit + 1)
+    return text[:cut if cut > limit // 2 else limit]
+
+def split_chunks(text, chunk_chars, max_chunks):
+    """Split text into at most ``max_chunks`` pieces of about ``chunk_chars`` characters
+
+    Returns the chunks and whatever text did not fit.
+    """
+    chunks = []
+    text = text.strip()
+    while text and len(chunks) < max_chunks:
+        chunk = _cut(text, chunk_chars)
+        chunks.append(chunk)
+        text = text[len(chunk):].lstrip()
+    return chunks, text
+
+def _apply_policy(text, policy):
+    """Pieces of a raw complaint to score, and the text left over"""
+    if policy.mode == 'chunk':
+        return split_chunks(text, policy.chunk_chars, policy.max_chunks)
+    if policy.mode == 'truncate':
+        kept = _cut(text, policy.max_chars)
+        return [kept], text[len(kept):]
+    return [text], ''
+
+def classify_batch(texts, model, vectorizer, policy=None):
+    """Classify raw complaints under a length policy, vectorizing the whole batch at once
+
+    Returns one ``(prediction, score, cleaned_text, cost)`` tuple per text.
+    The prediction is the encoded class index, or None if nothing survives
+    cleaning. A complaint split into chunks gets the average of its chunks'
+    class scores, weighted by each chunk's number of in-vocabulary n-grams.
+    ``cost`` describes how much of the input was processed; its latency is
+    the batch time spread evenly over the batch.
+    """
+    policy = policy or LengthPolicy()
+    start = time.perf_counter()
+    # Missing values (None, NaN from JSON or pandas) are empty, as in clean_text
+    texts = ['' if pd.api.types.is_scalar(text) and pd.isna(text) else str(text) for text in texts]
+
+    owners, cleaned_chunks, costs = [], [], []
+    with span('clean_text'):
+        for row, text in enumerate(texts):
+            chunks, rest = _apply_policy(text, policy)
+            kept = [cleaned for cleaned in (clean_text(chunk) for chunk in chunks) if cleaned]
+            owners.extend([row] * len(kept))
+            cleaned_chunks.extend(kept)
+            costs.append({
+                'chars_received': len(text),
+                'chars_processed': sum(len(chunk) for chunk in chunks),
+                'chunks': len(kept),
+                'truncated': bool(rest.strip()),
+            })
+
+    results = [(None, None, '', cost) for cost in costs]
+    if cleaned_chunks:
+        owners = np.asarray(owners)
+        with span('transform'):
+            text_vectors = vectorizer.transform(cleaned_chunks)
+        with span('predict'):
+            scores = class_scores(model, text_vectors)
+        weights = np.diff(text_vectors.indptr).astype(float)
+        # Chunks are stored in row order, so each row owns one contiguous slice
+        rows, starts = np.unique(owners, return_index=True)
+        for row, first, last in zip(rows, starts, np.append(starts[1:], len(owners))):
+            row_scores = scores[first]
+            if last - first > 1:
+                row_weights = weights[first:last] if weights[first:last].sum() > 0 else None
+                row_scores = np.average(scores[first:last], axis=0, weights=row_weights)
+            best = int(row_scores.argmax())
+            cleaned = ' '.join(cleaned_chunks[first:last])
+            results[row] = (model.classes_[best], float(row_scores[best]), cleaned, costs[row])
+
+    latency_ms = (time.perf_counter() - start) * 1000 / max(len(texts), 1)
+    for cost in costs:
+        cost['latency_ms'] = latency_ms
+    return results
@@ -0,0 +1,283 @@
+"""Replay a complaint stream against the classifier and report capacity numbers
+
+    python loadtest.py complaints.jsonl --modes inprocess http --concurrency 1 4 16
+    python loadtest.py --synthetic 5000 --rate 200 --duration 30
+    python loadtest.py --serve --dataset D2 --model svm --port 8000
+
+Each run reports throughput, latency percentiles, error rate, and the CPU
+use and peak memory growth of this (client) process during the run.
+``http`` runs go through a local stand-in endpoint (POST /classify) started
+in this process, or ``--url`` if given. That endpoint is measured once per
+concurrency rather than per dataset and model, and the client columns
+describe only the load generator, not the server.
+With ``--rate`` requests arrive on a schedule and latency includes time spent
+waiting for a free worker; without it every worker sends back to back.
+"""
+import argparse
+import http.client
+import itertools
+import json
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import numpy as np
+import pandas as pd
+
+import classify
+from artifacts import DATASETS, load_vectorizer
+from resource_usage import cpu_seconds, peak_rss_mb
+
+MODES = ('inprocess', 'http')
+
+def synthetic_complaints(n, dataset='D1', seed=0):
+    """Complaints of realistic length drawn from a vectorizer's single-word vocabulary"""
+    rng = np.random.default_rng(seed)
+    words = [term for term in load_vectorizer(dataset).vocabulary_ if ' ' not in term]
+    lengths = np.clip(rng.lognormal(mean=4.8, sigma=0.8, size=n).astype(int), 3, 3000)
+    return [' '.join(rng.choice(words, length)) for length in lengths]
+
+def recorded_complaints(paths, text_field='complaints'):
+    """Complaint texts from JSONL/CSV files, read the same way as classify.py"""
+    errors = []
+    complaints = [text for _, text in classify.read_rows(paths, 'auto', text_field, 'id', errors)]
+    if errors:
+        print(f'{len(errors)} unreadable rows skipped', file=sys.stderr)
+    return complaints
+
+# Stand-in HTTP endpoint
+
+class _ClassifyHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; don't let Nagle hold the body back
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        if self.path != '/classify':
+            self.send_error(404)
+            return
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            record = classify._classify([(payload.get('id'), payload['complaints'])])[0]
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            self.send_error(400, str(e))
+            return
+        body = json.dumps(record).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def make_server(dataset, model_name, host='127.0.0.1', port=0):
+    """HTTP server classifying JSON {"complaints": ...} posted to /classify; port 0 picks a free one"""
+    classify._load_pipeline(dataset, model_name)
+    server = ThreadingHTTPServer((host, port), _ClassifyHandler)
+    server.daemon_threads = True
+    return server
+
+# Senders: take one complaint, raise on failure
+
+def inprocess_sender():
+    def send(text):
+        classify._classify([(None, text)])
+    return send
+
+def http_sender(url):
+    """Sender posting to ``url`` over one keep-alive connection per thread"""
+    parts = urlsplit(url)
+    local = threading.local()
+
+    def send(text):
+        connection = getattr(local, 'connection', None)
+        if connection is None:
+            connection = local.connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=60)
+        try:
+            connection.request('POST', parts.path or '/', json.dumps({'complaints': text}).encode(),
+                               {'Content-Type': 'application/json'})
+            response = connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            local.connection = None
+            raise
+        if response.status != 200:
+            raise RuntimeError(f'HTTP {response.status}')
+    return send
+
+def run_load(send, complaints, concurrency=4, rate=None, duration=None, max_requests=None, seed=0):
+    """Replay complaints through ``send`` and measure it
+
+    Without ``rate`` each of ``concurrency`` workers sends the next complaint
+    as soon as its last one finishes. With ``rate`` (requests per second)
+    complaints arrive as a Poisson process and latency is measured from the
+    scheduled arrival, so queueing behind busy workers counts. ``duration``
+    cycles the stream for that many seconds; otherwise it is sent once.
+    """
+    if duration:
+        stream = itertools.cycle(complaints)
+        max_requests = max_requests or (int(rate * duration) if rate else None)
+    else:
+        stream = iter(complaints)
+    if max_requests:
+        stream = itertools.islice(stream, max_requests)
+    rng = np.random.default_rng(seed)
+
+    latencies = []
+    errors = []
+
+    def timed(text, scheduled):
+        start = scheduled if scheduled is not None else time.perf_counter()
+        try:
+            send(text)
+        except Exception as e:
+            errors.append(repr(e))
+            return
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    cpu_start = cpu_seconds()
+    peak_start = peak_rss_mb()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        if rate:
+            arrival = start
+            for text in stream:
+                arrival += rng.exponential(1.0 / rate)
+                if duration and arrival - start > duration:
+                    break
+                delay = arrival - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(timed, text, arrival)
+        else:
+            # Keep a bounded queue in front of the workers so long streams are not loaded up front
+            pending = set()
+            for text in stream:
+                if duration and time.perf_counter() - start > duration:
+                    break
+                pending.add(executor.submit(timed, text, None))
+                if len(pending) >= concurrency * 4:
+                    _, pending = wait(pending, return_when=FIRST_COMPLETED)
+    seconds = time.perf_counter() - start
+    cpu_end = cpu_seconds()
+    peak_end = peak_rss_mb()
+
+    completed = len(latencies) + len(errors)
+    latency = np.array(latencies) if latencies else np.array([np.nan])
+    return {
+        'requests': completed,
+        'errors': len(errors),
+        'error_rate': len(errors) / completed if completed else 0.0,
+        'throughput_rps': len(latencies) / seconds if seconds else 0.0,
+        'latency_ms_p50': float(np.percentile(latency, 50)),
+        'latency_ms_p90': float(np.percentile(latency, 90)),
+        'latency_ms_p95': float(np.percentile(latency, 95)),
+        'latency_ms_p99': float(np.percentile(latency, 99)),
+        'latency_ms_max': float(np.max(latency)),
+        'client_cpu_percent': None if cpu_start is None else (cpu_end - cpu_start) / seconds * 100,
+        # The peak is process-wide, so report how far this run raised it rather than carrying earlier runs' peaks
+        'client_peak_rss_growth_mb': None if peak_start is None else peak_end - peak_start,
+        'first_error': errors[0] if errors else None,
+    }
+
+def _run_concurrencies(send, complaints, concurrencies, rate, duration, max_requests, **labels):
+    return [{**labels, 'concurrency': concurrency, 'rate': rate,
+             **run_load(send, complaints, concurrency, rate, duration, max_requests)}
+            for concurrency in concurrencies]
+
+def run_matrix(complaints, datasets=DATASETS, model_names=tuple(classify.MODEL_CHOICES.values()), modes=MODES,
+               concurrencies=(1, 4), rate=None, duration=None, max_requests=None, url=None):
+    """One run_load result per dataset, model, mode and concurrency
+
+    With ``url`` the http runs measure that endpoint once per concurrency,
+    whatever it serves, so those rows carry the URL instead of a dataset and model.
+    """
+    rows = []
+    if url is not None and 'http' in modes:
+        rows += _run_concurrencies(http_sender(url), complaints, concurrencies, rate, duration, max_requests,
+                                   dataset=None, model=None, mode='http', url=url)
+        modes = [mode for mode in modes if mode != 'http']
+    if not modes:
+        return pd.DataFrame(rows)
+
+    for dataset in datasets:
+        for model_name in model_names:
+            classify._load_pipeline(dataset, model_name)
+            for mode in modes:
+                server = None
+                if mode == 'http':
+                    server = make_server(dataset, model_name)
+                    threading.Thread(target=server.serve_forever, daemon=True).start()
+                    send = http_sender(f'http://127.0.0.1:{server.server_address[1]}/classify')
+                else:
+                    send = inprocess_sender()
+                try:
+                    rows += _run_concurrencies(send, complaints, concurrencies, rate, duration, max_requests,
+                                               dataset=dataset, model=model_name, mode=mode, url=None)
+                finally:
+                    if server is not None:
+                        server.shutdown()
+                        server.server_close()
+    return pd.DataFrame(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test the complaint classifier in-process and over HTTP')
+    parser.add_argument('inputs', nargs='*', help='recorded complaints (JSONL or CSV)')
+    parser.add_argument('--synthetic', type=int, default=0, help='generate this many complaints instead')
+    parser.add_argument('--text-field', default='complaints')
+    parser.add_argument('--dataset', nargs='+', default=list(DATASETS), choices=DATASETS)
+    parser.add_argument('--model', nargs='+', default=sorted(classify.MODEL_CHOICES),
+                        choices=sorted(classify.MODEL_CHOICES))
+    parser.add_argument('--modes', nargs='+', default=list(MODES), choices=MODES)
+    parser.add_argument('--concurrency', nargs='+', type=int, default=[1, 4])
+    parser.add_argument('--rate', type=float, default=None, help='arrivals per second (default: as fast as possible)')
+    parser.add_argument('--duration', type=float, default=None, help='seconds per run, cycling the stream')
+    parser.add_argument('--requests', type=int, default=None, help='requests per run')
+    parser.add_argument('--url', help='existing /classify endpoint to use for http runs, measured once '
+                                          'rather than per dataset and model')
+    parser.add_argument('--output', help='also write the results to this CSV')
+    parser.add_argument('--serve', action='store_true', help='only run the stand-in endpoint')
+    parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args()
+
+    model_names = [classify.MODEL_CHOICES[model] for model in args.model]
+    if args.serve:
+        server = make_server(args.dataset[0], model_names[0], port=args.port)
+        print(f'Serving {args.dataset[0]} {model_names[0]} on http://127.0.0.1:{args.port}/classify', file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.server_close()
+        return 0
+
+    if args.synthetic:
+        complaints = synthetic_complaints(args.synthetic)
+    elif args.inputs:
+        complaints = recorded_complaints(args.inputs, args.text_field)
+    else:
+        parser.error('give input files or --synthetic N')
+    if not complaints:
+        print('No complaints to send', file=sys.stderr)
+        return 2
+
+    results = run_matrix(complaints, args.dataset, model_names, args.modes, args.concurrency,
+                         args.rate, args.duration, args.requests, args.url)
+    if args.output:
+        results.to_csv(args.output, index=False)
+    hidden = ['first_error'] if args.url else ['first_error', 'url']
+    print(results.drop(columns=hidden).round(2).to_string(index=False))
+    errors = results[results['errors'] > 0]
+    for _, row in errors.iterrows():
+        target = row['url'] or f"{row['dataset']} {row['model']} {row['mode']}"
+        print(f"{target} x{row['concurrency']}: "
+              f"{row['errors']} errors, first: {row['first_error']}", file=sys.stderr)
+    return 1 if len(errors) else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
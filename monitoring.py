@@ -0,0 +1,109 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from artifacts import MODEL_NAMES
+
+# One fixed-width row per prediction; a full buffer overwrites its oldest rows
+RECORD_DTYPE = np.dtype([
+    ('timestamp', 'f8'),
+    ('dataset', 'U2'),
+    ('model', 'i1'),
+    ('predicted', 'i2'),
+    ('top_score', 'f4'),
+    ('token_count', 'i4'),
+    ('oov_count', 'i4'),
+    ('empty', '?'),
+    ('latency_ms', 'f4'),
+])
+
+def count_oov(cleaned_text, vocabulary):
+    """Number of tokens and number of tokens missing from a TF-IDF vocabulary"""
+    tokens = cleaned_text.split()
+    return len(tokens), sum(1 for token in tokens if token not in vocabulary)
+
+class PredictionMonitor:
+    """Ring buffer of per-prediction metadata with rolling summaries"""
+
+    def __init__(self, capacity=50000):
+        self._records = np.zeros(capacity, dtype=RECORD_DTYPE)
+        self._next = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def record(self, dataset, model_name, predicted, top_score, token_count, oov_count, latency_ms, timestamp=None):
+        """Store one prediction; an empty-after-cleaning input has predicted=-1"""
+        row = (
+            time.time() if timestamp is None else timestamp,
+            dataset,
+            MODEL_NAMES.index(model_name),
+            predicted,
+            top_score,
+            token_count,
+            oov_count,
+            token_count == 0,
+            latency_ms,
+        )
+        with self._lock:
+            self._records[self._next] = row
+            self._next = (self._next + 1) % len(self._records)
+            self._count = min(self._count + 1, len(self._records))
+
+    def record_prediction(self, dataset, model_name, cleaned_text, vocabulary, predicted, top_score, latency_ms):
+        """Store a prediction, deriving token and OOV counts from the cleaned text"""
+        token_count, oov_count = count_oov(cleaned_text, vocabulary)
+        self.record(dataset, model_name, predicted, top_score, token_count, oov_count, latency_ms)
+
+    def snapshot(self, window_seconds=None):
+        """Copy of the buffered records, oldest first, optionally limited to a recent window"""
+        with self._lock:
+            if self._count < len(self._records):
+                records = self._records[:self._count].copy()
+            else:
+                records = np.concatenate([self._records[self._next:], self._records[:self._next]])
+        if window_seconds is not None:
+            records = records[records['timestamp'] >= time.time() - window_seconds]
+        return records
+
+    def summary(self, window_seconds=3600, dataset=None):
+        """Rolling counts, throughput, OOV and empty rates, latency and class mix"""
+        records = self.snapshot(window_seconds)
+        if dataset is not None:
+            records = records[records['dataset'] == dataset]
+        if len(records) == 0:
+            return {'count': 0}
+
+        span = max(records['timestamp'][-1] - records['timestamp'][0], 1.0)
+        tokens = records['token_count'].sum()
+        scored = records[~records['empty']]
+        distribution = {}
+        for name in np.unique(scored['dataset']):
+            predicted = scored['predicted'][scored['dataset'] == name]
+            counts = np.bincount(predicted)
+            distribution[str(name)] = {int(i): float(c / len(predicted)) for i, c in enumerate(counts) if c}
+
+        return {
+            'count': int(len(records)),
+            'throughput_per_min': float(len(records) / span * 60),
+            'oov_rate': float(records['oov_count'].sum() / tokens) if tokens else 0.0,
+            'empty_rate': float(records['empty'].mean()),
+            'latency_ms_p50': float(np.percentile(records['latency_ms'], 50)),
+            'latency_ms_p95': float(np.percentile(records['latency_ms'], 95)),
+            'class_distribution': distribution,
+        }
+
+    def oov_trend(self, bucket_seconds=300, window_seconds=86400):
+        """OOV rate and prediction count per time bucket, for spotting vocabulary drift"""
+        records = self.snapshot(window_seconds)
+        frame = pd.DataFrame({
+            'bucket': pd.to_datetime(records['timestamp'] // bucket_seconds * bucket_seconds, unit='s'),
+            'dataset': records['dataset'],
+            'tokens': records['token_count'],
+            'oov': records['oov_count'],
+        })
+        trend = frame.groupby(['dataset', 'bucket']).agg(tokens=('tokens', 'sum'), oov=('oov', 'sum'),
+                                                         count=('tokens', 'size')).reset_index()
+        trend['oov_rate'] = (trend['oov'] / trend['tokens'].where(trend['tokens'] > 0)).fillna(0.0)
+        return trend
@@ -0,0 +1,26 @@
+"""CPU time and peak memory of the current process, where the platform reports them"""
+import sys
+
+def _usage():
+    try:
+        import resource
+    except ImportError:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF)
+
+def cpu_seconds():
+    """User plus system CPU seconds used by this process so far, or None where unsupported"""
+    usage = _usage()
+    return None if usage is None else usage.ru_utime + usage.ru_stime
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB, or None where unsupported
+
+    This is a high-water mark over the whole process lifetime; compare two
+    readings to see how much a piece of work raised it.
+    """
+    usage = _usage()
+    if usage is None:
+        return None
+    # ru_maxrss is reported in bytes on macOS and kilobytes elsewhere
+    return usage.ru_maxrss / (1024 * 1024) if sys.platform == 'darwin' else usage.ru_maxrss / 1024
@@ -0,0 +1,196 @@
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timezone
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+DEFAULT_PATH = 'results.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    scored_at REAL NOT NULL,
+    scored_date TEXT NOT NULL,
+    dataset TEXT NOT NULL,
+    model TEXT NOT NULL,
+    complaint_id TEXT,
+    complaint TEXT,
+    category TEXT NOT NULL,
+    score REAL
+);
+CREATE INDEX IF NOT EXISTS idx_results_partition ON results (dataset, scored_date);
+CREATE INDEX IF NOT EXISTS idx_results_category ON results (dataset, category, scored_date);
+CREATE TABLE IF NOT EXISTS features (
+    result_id INTEGER PRIMARY KEY REFERENCES results (id),
+    cleaned_text TEXT,
+    tfidf_indices BLOB,
+    tfidf_values BLOB
+);
+"""
+
+def _to_date(value):
+    """ISO date string for a date, datetime or ISO string"""
+    if isinstance(value, datetime):
+        return value.astimezone(timezone.utc).date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)[:10]
+
+class ResultsStore:
+    """SQLite store of scored complaints, indexed by dataset, date and category
+
+    Rows are appended in bulk inside a single transaction. The (dataset,
+    scored_date) index plays the role of partitioning: queries on a
+    dataset and date range only touch the matching index range. Cleaned
+    text and TF-IDF vectors are optional and live in a side table so the
+    main table stays narrow for dashboard aggregations.
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def append(self, dataset, model_name, complaints, categories, scores, complaint_ids=None,
+               scored_at=None, cleaned_texts=None, vectors=None):
+        """Append a batch of scored complaints; returns the number of rows written
+
+        ``vectors`` is an optional sparse matrix with one TF-IDF row per complaint.
+        """
+        n_rows = len(categories)
+        scored_at = time.time() if scored_at is None else scored_at
+        scored_date = datetime.fromtimestamp(scored_at, timezone.utc).date().isoformat()
+        complaint_ids = [None] * n_rows if complaint_ids is None else [
+            None if i is None else str(i) for i in complaint_ids
+        ]
+        complaints = [None] * n_rows if complaints is None else list(complaints)
+        rows = [
+            (scored_at, scored_date, dataset, model_name, complaint_ids[i], complaints[i],
+             str(categories[i]), None if scores is None else float(scores[i]))
+            for i in range(n_rows)
+        ]
+
+        with self._lock:
+            # Take the write lock up front so the ids assigned below stay ours
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                self._insert(rows, cleaned_texts, vectors)
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+        return n_rows
+
+    def _insert(self, rows, cleaned_texts, vectors):
+        first_id = self._conn.execute('SELECT COALESCE(MAX(id), 0) FROM results').fetchone()[0] + 1
+        self._conn.executemany(
+            'INSERT INTO results (id, scored_at, scored_date, dataset, model, complaint_id, complaint, category, score) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            [(first_id + i,) + row for i, row in enumerate(rows)],
+        )
+        if cleaned_texts is None and vectors is None:
+            return
+        vectors = None if vectors is None else sparse.csr_matrix(vectors)
+        feature_rows = []
+        for i in range(len(rows)):
+            indices = values = None
+            if vectors is not None:
+                row = slice(vectors.indptr[i], vectors.indptr[i + 1])
+                indices = vectors.indices[row].astype(np.int32).tobytes()
+                values = vectors.data[row].astype(np.float32).tobytes()
+            text = None if cleaned_texts is None else cleaned_texts[i]
+            feature_rows.append((first_id + i, text, indices, values))
+        self._conn.executemany(
+            'INSERT INTO features (result_id, cleaned_text, tfidf_indices, tfidf_values) VALUES (?, ?, ?, ?)',
+            feature_rows,
+        )
+
+    def _where(self, dataset=None, category=None, min_score=None, max_score=None, start=None, end=None, prefix=''):
+        clauses, params = [], []
+        if dataset is not None:
+            clauses.append(prefix + 'dataset = ?')
+            params.append(dataset)
+        if category is not None:
+            categories = [category] if isinstance(category, str) else list(category)
+            clauses.append(prefix + f"category IN ({', '.join('?' * len(categories))})")
+            params.extend(categories)
+        if min_score is not None:
+            clauses.append(prefix + 'score >= ?')
+            params.append(min_score)
+        if max_score is not None:
+            clauses.append(prefix + 'score <= ?')
+            params.append(max_score)
+        if start is not None:
+            clauses.append(prefix + 'scored_date >= ?')
+            params.append(_to_date(start))
+        if end is not None:
+            clauses.append(prefix + 'scored_date <= ?')
+            params.append(_to_date(end))
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def query(self, dataset=None, category=None, min_score=None, max_score=None, start=None, end=None,
+              limit=None, with_features=False):
+        """Scored complaints matching the filters; dates are inclusive"""
+        where, params = self._where(dataset, category, min_score, max_score, start, end, prefix='r.')
+        columns = 'r.id, r.scored_at, r.scored_date, r.dataset, r.model, r.complaint_id, r.complaint, r.category, r.score'
+        join = ''
+        if with_features:
+            columns += ', f.cleaned_text'
+            join = ' LEFT JOIN features f ON f.result_id = r.id'
+        sql = f'SELECT {columns} FROM results r{join}{where} ORDER BY r.id'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params = params + [int(limit)]
+        with self._lock:
+            return pd.read_sql_query(sql, self._conn, params=params)
+
+    def aggregate(self, dataset=None, category=None, min_score=None, max_score=None, start=None, end=None):
+        """Complaint count and mean score per date, dataset and category"""
+        where, params = self._where(dataset, category, min_score, max_score, start, end)
+        sql = (
+            'SELECT scored_date, dataset, category, COUNT(*) AS complaints, AVG(score) AS mean_score '
+            f'FROM results{where} GROUP BY scored_date, dataset, category ORDER BY scored_date, dataset, category'
+        )
+        with self._lock:
+            return pd.read_sql_query(sql, self._conn, params=params)
+
+    def vectors(self, result_ids, n_features):
+        """Stored TF-IDF vectors for the given result ids as a CSR matrix (empty rows if not stored)"""
+        result_ids = [int(i) for i in result_ids]
+        stored = {}
+        with self._lock:
+            for chunk_start in range(0, len(result_ids), 500):
+                chunk = result_ids[chunk_start:chunk_start + 500]
+                cursor = self._conn.execute(
+                    f"SELECT result_id, tfidf_indices, tfidf_values FROM features "
+                    f"WHERE result_id IN ({', '.join('?' * len(chunk))})",
+                    chunk,
+                )
+                stored.update((row[0], row[1:]) for row in cursor)
+
+        indptr, indices, values = [0], [], []
+        for result_id in result_ids:
+            row_indices, row_values = stored.get(result_id, (None, None))
+            if row_indices is not None:
+                indices.append(np.frombuffer(row_indices, dtype=np.int32))
+                values.append(np.frombuffer(row_values, dtype=np.float32))
+            indptr.append(indptr[-1] + (len(indices[-1]) if row_indices is not None else 0))
+        indices = np.concatenate(indices) if indices else np.empty(0, dtype=np.int32)
+        values = np.concatenate(values) if values else np.empty(0, dtype=np.float32)
+        return sparse.csr_matrix((values, indices, indptr), shape=(len(result_ids), n_features))
@@ -0,0 +1,150 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.preprocessing import normalize
+
+from artifacts import DATASETS, load_vectorizer
+
+# Vectorizer settings that decide how text is split into n-grams; they must
+# match for one tokenization pass to serve every vectorizer
+ANALYSIS_PARAMS = ('input', 'encoding', 'decode_error', 'strip_accents', 'lowercase', 'preprocessor',
+                   'tokenizer', 'stop_words', 'token_pattern', 'ngram_range', 'analyzer')
+
+class SharedVocabulary:
+    """TF-IDF features for several fitted vectorizers from one tokenization pass
+
+    Every n-gram of the vectorizers' vocabularies gets one column in a union
+    vocabulary, plus its column position in each vectorizer (-1 where a
+    vectorizer does not know it). Texts are tokenized and counted once over
+    the union; each vectorizer's matrix is then a remap of those counts with
+    its own idf weights and normalization applied.
+    """
+
+    def __init__(self, vectorizers):
+        self.vectorizers = dict(vectorizers)
+        fitted = list(self.vectorizers.values())
+        params = fitted[0].get_params()
+        for vectorizer in fitted[1:]:
+            other = vectorizer.get_params()
+            differing = [name for name in ANALYSIS_PARAMS if other[name] != params[name]]
+            if differing:
+                raise ValueError(f'Vectorizers tokenize differently: {", ".join(differing)}')
+
+        terms = sorted(set().union(*(vectorizer.vocabulary_ for vectorizer in fitted)))
+        self.vocabulary_ = {term: column for column, term in enumerate(terms)}
+        self.counter = CountVectorizer(vocabulary=self.vocabulary_, dtype=np.int64,
+                                       **{name: params[name] for name in ANALYSIS_PARAMS})
+        self.columns = {}
+        for name, vectorizer in self.vectorizers.items():
+            columns = np.full(len(terms), -1, dtype=np.int64)
+            for term, column in vectorizer.vocabulary_.items():
+                columns[self.vocabulary_[term]] = column
+            self.columns[name] = columns
+
+    def overlap(self):
+        """Union size and the number of n-grams shared by every vectorizer"""
+        shared = np.all(np.stack(list(self.columns.values())) >= 0, axis=0)
+        return {'union_terms': len(self.vocabulary_), 'shared_terms': int(shared.sum()),
+                **{f'{name}_terms': len(vectorizer.vocabulary_) for name, vectorizer in self.vectorizers.items()}}
+
+    def _project(self, counts, name):
+        """One vectorizer's TF-IDF matrix from union counts"""
+        vectorizer = self.vectorizers[name]
+        columns = self.columns[name][counts.indices]
+        keep = columns >= 0
+        indptr = np.concatenate(([0], np.cumsum(keep)))[counts.indptr]
+        X = sparse.csr_matrix((counts.data[keep].astype(vectorizer.dtype), columns[keep], indptr),
+                              shape=(counts.shape[0], len(vectorizer.vocabulary_)))
+        X.sort_indices()
+
+        # Same steps as TfidfTransformer.transform
+        if vectorizer.binary:
+            X.data[:] = 1
+        if vectorizer.sublinear_tf:
+            np.log(X.data, X.data)
+            X.data += 1
+        if vectorizer.use_idf:
+            X.data *= vectorizer.idf_[X.indices]
+        if vectorizer.norm is not None:
+            X = normalize(X, norm=vectorizer.norm, copy=False)
+        return X
+
+    def transform(self, texts, names=None):
+        """Dict of TF-IDF matrices, one per vectorizer name, from cleaned texts"""
+        counts = self.counter.transform(texts)
+        return {name: self._project(counts, name) for name in (names or self.vectorizers)}
+
+def load_shared_vocabulary(datasets=DATASETS):
+    """Shared vocabulary over the saved vectorizers of the given datasets"""
+    return SharedVocabulary({dataset: load_vectorizer(dataset) for dataset in datasets})
+
+def check_equivalence(shared, texts, tolerance=1e-12):
+    """Largest difference between shared and original features, per vectorizer
+
+    Raises AssertionError if the sparsity pattern differs or any value is
+    further than ``tolerance`` from the original vectorizer's output.
+    """
+    texts = list(texts)
+    combined = shared.transform(texts)
+    differences = {}
+    for name, vectorizer in shared.vectorizers.items():
+        expected = vectorizer.transform(texts)
+        actual = combined[name]
+        if expected.shape != actual.shape or expected.nnz != actual.nnz:
+            raise AssertionError(f'{name}: shape/nnz {actual.shape}/{actual.nnz}, '
+                                 f'expected {expected.shape}/{expected.nnz}')
+        difference = abs(expected - actual)
+        differences[name] = float(difference.max()) if difference.nnz else 0.0
+        if differences[name] > tolerance:
+            raise AssertionError(f'{name}: features differ by up to {differences[name]:.3g}')
+    return differences
+
+def benchmark(shared, texts, repeats=3):
+    """Best-of seconds for the separate vectorizers and for the shared pass"""
+    texts = list(texts)
+    timings = {}
+    for label, transform in (
+        ('separate', lambda: [vectorizer.transform(texts) for vectorizer in shared.vectorizers.values()]),
+        ('shared', lambda: shared.transform(texts)),
+    ):
+        best = float('inf')
+        for _ in range(repeats):
+            start = time.perf_counter()
+            transform()
+            best = min(best, time.perf_counter() - start)
+        timings[label] = best
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the D1/D2 shared vocabulary and check it against the originals')
+    parser.add_argument('data', help="CSV with a 'complaints' column")
+    parser.add_argument('--rows', type=int, default=5000)
+    args = parser.parse_args()
+
+    from preprocessing import clean_texts
+
+    shared = load_shared_vocabulary()
+    for key, value in shared.overlap().items():
+        print(f'{key}: {value}')
+
+    texts = clean_texts(pd.read_csv(args.data, nrows=args.rows)['complaints'])
+    try:
+        differences = check_equivalence(shared, texts)
+    except AssertionError as e:
+        print(f'Not equivalent: {e}', file=sys.stderr)
+        return 1
+    for name, difference in differences.items():
+        print(f'{name}: equivalent on {len(texts)} texts (max difference {difference:.2g})')
+
+    timings = benchmark(shared, texts)
+    print(f"separate: {timings['separate']:.3f}s, shared: {timings['shared']:.3f}s "
+          f"({timings['separate'] / timings['shared']:.2f}x)")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
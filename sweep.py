@@ -0,0 +1,162 @@
+import argparse
+import itertools
+import pickle
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import LabelEncoder
+
+from training import fit_balanced, smote_available
+
+# Settings used by the training notebooks
+DEFAULT_VECTORIZER_GRID = {
+    'max_features': [10000],
+    'ngram_range': [(1, 2)],
+    'min_df': [2],
+    'max_df': [0.95],
+}
+DEFAULT_CLASSIFIER_GRID = {
+    'model': ['Logistic Regression', 'Support Vector Machine'],
+    'C': [0.25, 1.0, 4.0],
+    'balancing': ['none', 'class_weight', 'streamed', 'smote'],
+}
+
+# Training data of the current vectorizer config, set once per worker process
+_data = {}
+
+def expand_grid(grid):
+    """All combinations of a parameter grid as a list of dicts"""
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[key] for key in keys))]
+
+def _init_worker(X_train, y_train, X_val, y_val):
+    _data.update(X_train=X_train, y_train=y_train, X_val=X_val, y_val=y_val)
+
+def _run_trial(config, fraction):
+    """Fit one classifier config on a stratified fraction of the training matrix"""
+    X_train, y_train = _data['X_train'], _data['y_train']
+    if fraction < 1.0:
+        rows, _ = train_test_split(np.arange(len(y_train)), train_size=fraction, stratify=y_train, random_state=42)
+        X_train, y_train = X_train[rows], y_train[rows]
+
+    start = time.perf_counter()
+    model = fit_balanced(config['model'], X_train, y_train, config['balancing'], C=config['C'])
+    train_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    y_pred = model.predict(_data['X_val'])
+    predict_seconds = time.perf_counter() - start
+    return {
+        'fraction': fraction,
+        'accuracy': accuracy_score(_data['y_val'], y_pred),
+        'macro_f1': f1_score(_data['y_val'], y_pred, average='macro'),
+        'train_seconds': train_seconds,
+        'predict_ms_per_row': predict_seconds * 1000 / len(y_pred),
+        'model_bytes': len(pickle.dumps(model)),
+    }
+
+def successive_halving(configs, executor, eta=3, min_fraction=1 / 9, metric='macro_f1'):
+    """Run configs on growing training fractions, keeping the best 1/eta at each rung"""
+    fractions = []
+    fraction = 1.0
+    while fraction >= min_fraction * (1 - 1e-9):
+        fractions.insert(0, fraction)
+        fraction /= eta
+
+    survivors = list(configs)
+    records = []
+    for rung, fraction in enumerate(fractions):
+        futures = [executor.submit(_run_trial, config, fraction) for config in survivors]
+        scored = []
+        for config, future in zip(survivors, futures):
+            result = {**config, **future.result(), 'rung': rung}
+            records.append(result)
+            scored.append((result[metric], config))
+        if rung < len(fractions) - 1:
+            keep = max(1, len(survivors) // eta)
+            scored.sort(key=lambda item: item[0], reverse=True)
+            survivors = [config for _, config in scored[:keep]]
+    return records
+
+def run_sweep(texts, labels, vectorizer_grid=None, classifier_grid=None, workers=None, eta=3,
+              min_fraction=1 / 9, validation_size=0.2):
+    """Sweep vectorizer and classifier configs on cleaned texts
+
+    The TF-IDF matrix is fitted once per vectorizer config and shared by all
+    classifier trials through the pool initializer. Returns one row per
+    trial and rung; rows with ``final`` set were trained on all data.
+    """
+    vectorizer_grid = vectorizer_grid or DEFAULT_VECTORIZER_GRID
+    classifier_configs = expand_grid(classifier_grid or DEFAULT_CLASSIFIER_GRID)
+    if not smote_available() and any(config['balancing'] == 'smote' for config in classifier_configs):
+        warnings.warn('imbalanced-learn is not installed; skipping the SMOTE configs')
+        classifier_configs = [config for config in classifier_configs if config['balancing'] != 'smote']
+
+    y = LabelEncoder().fit_transform(labels)
+    texts_train, texts_val, y_train, y_val = train_test_split(
+        list(texts), y, test_size=validation_size, random_state=42, stratify=y
+    )
+
+    records = []
+    for vectorizer_config in expand_grid(vectorizer_grid):
+        vectorizer = TfidfVectorizer(**vectorizer_config)
+        X_train = vectorizer.fit_transform(texts_train)
+        start = time.perf_counter()
+        X_val = vectorizer.transform(texts_val)
+        vectorize_ms = (time.perf_counter() - start) * 1000 / len(texts_val)
+        vectorizer_bytes = len(pickle.dumps(vectorizer))
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(X_train, y_train, X_val, y_val)) as executor:
+            trials = successive_halving(classifier_configs, executor, eta=eta, min_fraction=min_fraction)
+        last_rung = max(trial['rung'] for trial in trials)
+        for trial in trials:
+            trial.update(vectorizer_config)
+            trial['final'] = trial['rung'] == last_rung
+            trial['latency_ms_per_row'] = vectorize_ms + trial['predict_ms_per_row']
+            trial['total_bytes'] = vectorizer_bytes + trial['model_bytes']
+        records.extend(trials)
+    return pd.DataFrame(records)
+
+def pick_fastest(results, min_accuracy):
+    """Fastest fully trained config whose accuracy meets the bar, or None"""
+    final = results[results['final'] & (results['accuracy'] >= min_accuracy)]
+    if final.empty:
+        return None
+    return final.sort_values(['latency_ms_per_row', 'total_bytes']).iloc[0]
+
+def main():
+    parser = argparse.ArgumentParser(description='Hyperparameter sweep over TF-IDF and classifier settings')
+    parser.add_argument('data', help="CSV with 'complaints' and 'product' columns")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--eta', type=int, default=3, help='keep 1/eta of the configs at each rung')
+    parser.add_argument('--min-accuracy', type=float, default=0.85)
+    parser.add_argument('--output', default='sweep_results.csv')
+    args = parser.parse_args()
+
+    from text_cache import clean_cached
+
+    df = pd.read_csv(args.data).dropna(subset=['complaints', 'product'])
+    cleaned = clean_cached(df['complaints'])
+    keep = cleaned.str.len() > 0
+    results = run_sweep(cleaned[keep], df.loc[keep, 'product'], workers=args.workers, eta=args.eta)
+    results.to_csv(args.output, index=False)
+
+    columns = ['model', 'C', 'balancing', 'max_features', 'ngram_range', 'accuracy', 'macro_f1',
+               'latency_ms_per_row', 'total_bytes']
+    print(results[results['final']].sort_values('accuracy', ascending=False)[columns].to_string(index=False))
+    best = pick_fastest(results, args.min_accuracy)
+    if best is None:
+        print(f'No config reached accuracy {args.min_accuracy:.2%}')
+    else:
+        print(f'\nFastest config with accuracy >= {args.min_accuracy:.2%}:')
+        print(best[columns].to_string())
+
+if __name__ == '__main__':
+    main()
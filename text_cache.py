@@ -0,0 +1,79 @@
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+from preprocessing import clean_text, preprocessing_fingerprint
+
+CACHE_DIR = '.cache'
+
+def text_key(text):
+    """16-byte content hash of a raw complaint"""
+    raw = '' if pd.isna(text) else str(text)
+    return hashlib.blake2b(raw.encode('utf-8'), digest_size=16).digest()
+
+class CleanedTextCache:
+    """Parquet cache of clean_text output keyed by raw-text hash
+
+    Each preprocessing fingerprint (stopwords, lemmatizer settings, length
+    filter) gets its own file, so changing any of them starts a fresh cache
+    instead of returning stale cleaned text.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, fingerprint=None):
+        self.fingerprint = fingerprint or preprocessing_fingerprint()
+        self.path = os.path.join(cache_dir, f'cleaned_text_{self.fingerprint[:16]}.parquet')
+        self._entries = None
+        self._dirty = False
+
+    def _load(self):
+        if self._entries is None:
+            self._entries = {}
+            if os.path.exists(self.path):
+                table = pd.read_parquet(self.path)
+                self._entries = dict(zip(table['key'], table['cleaned']))
+        return self._entries
+
+    def __len__(self):
+        return len(self._load())
+
+    def clean(self, texts):
+        """Cleaned text for each raw text, only running clean_text on unseen rows"""
+        entries = self._load()
+        keys = [text_key(text) for text in texts]
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in entries and key not in missing:
+                missing[key] = text
+        for key, text in missing.items():
+            entries[key] = clean_text(text)
+        if missing:
+            self._dirty = True
+        return [entries[key] for key in keys]
+
+    def clean_series(self, texts):
+        """Like clean() but returns a Series aligned to the input's index"""
+        texts = pd.Series(texts)
+        return pd.Series(self.clean(texts.tolist()), index=texts.index, dtype=object)
+
+    def save(self):
+        """Write the cache if it gained rows since it was loaded"""
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        table = pd.DataFrame({
+            'key': np.array(list(self._entries.keys()), dtype=object),
+            'cleaned': np.array(list(self._entries.values()), dtype=object),
+        })
+        tmp_path = self.path + '.tmp'
+        table.to_parquet(tmp_path, index=False, compression='zstd')
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+def clean_cached(texts, cache_dir=CACHE_DIR):
+    """Clean a column of complaints through the persisted cache, e.g. df['complaints']"""
+    cache = CleanedTextCache(cache_dir)
+    cleaned = cache.clean_series(texts)
+    cache.save()
+    return cleaned
@@ -0,0 +1,234 @@
+"""Opt-in request tracing for the inference path
+
+Set TRACE_FILE to append one JSON line per request with its trace ID and
+timed spans. TRACE_PROFILE_RATE (0-1) of the requests are also profiled:
+TRACE_PROFILER=sampling writes folded stacks (flamegraph.pl, speedscope,
+inferno) and TRACE_PROFILER=cprofile writes pstats files (snakeviz,
+flameprof), both under TRACE_PROFILE_DIR.
+
+    python tracing.py traces.jsonl --top 20
+"""
+import argparse
+import cProfile
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+import warnings
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+
+import pandas as pd
+
+PROFILERS = ('sampling', 'cprofile')
+
+_local = threading.local()
+_null = nullcontext()
+# Python 3.12+ allows one active cProfile per process, so captures take turns
+_cprofile_lock = threading.Lock()
+
+class StackSampler:
+    """Samples the stack of one thread at a fixed interval into folded-stack counts"""
+
+    def __init__(self, thread_id, interval=0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='trace-sampler', daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            if stack:
+                self.counts[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def dump(self, path):
+        with open(path, 'w') as f:
+            for stack, count in self.counts.most_common():
+                f.write(f'{stack} {count}\n')
+
+class Trace:
+    def __init__(self, name, attributes):
+        self.trace_id = uuid.uuid4().hex
+        self.name = name
+        self.attributes = attributes
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.spans = []
+
+class Tracer:
+    """Writes traced requests to a JSONL file; disabled when ``path`` is None"""
+
+    def __init__(self, path=None, profile_rate=0.0, profiler='sampling', profile_dir='profiles'):
+        if profiler not in PROFILERS:
+            raise ValueError(f'Unknown profiler: {profiler}')
+        self.path = path
+        self.profile_rate = profile_rate
+        self.profiler = profiler
+        self.profile_dir = profile_dir
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """Tracer from TRACE_FILE / TRACE_PROFILE_RATE / TRACE_PROFILER / TRACE_PROFILE_DIR"""
+        return cls(
+            path=os.environ.get('TRACE_FILE') or None,
+            profile_rate=float(os.environ.get('TRACE_PROFILE_RATE', 0.0)),
+            profiler=os.environ.get('TRACE_PROFILER', 'sampling'),
+            profile_dir=os.environ.get('TRACE_PROFILE_DIR', 'profiles'),
+        )
+
+    @property
+    def enabled(self):
+        return self.path is not None
+
+    @contextmanager
+    def request(self, name, **attributes):
+        """Trace the work done in this thread until the block exits"""
+        if not self.enabled or getattr(_local, 'trace', None) is not None:
+            with span(name):
+                yield None
+            return
+
+        trace = _local.trace = Trace(name, attributes)
+        profiler = None
+        try:
+            if self.profile_rate and random.random() < self.profile_rate:
+                profiler = self._start_profiler()
+            yield trace
+        finally:
+            duration_ms = (time.perf_counter() - trace.start) * 1000
+            _local.trace = None
+            profile_path = self._stop_profiler(profiler, trace.trace_id) if profiler is not None else None
+            self._write({
+                'trace_id': trace.trace_id,
+                'name': trace.name,
+                'started_at': trace.started_at,
+                'duration_ms': duration_ms,
+                'attributes': trace.attributes,
+                'spans': trace.spans,
+                'profile': profile_path,
+            })
+
+    def _start_profiler(self):
+        """Profiler running on this thread, or None if one cannot be started right now"""
+        if self.profiler == 'cprofile':
+            # Skip rather than wait when another request is being profiled
+            if not _cprofile_lock.acquire(blocking=False):
+                return None
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another profiling tool (a debugger, coverage) is already active
+                _cprofile_lock.release()
+                return None
+            return profiler
+        profiler = StackSampler(threading.get_ident())
+        try:
+            profiler.start()
+        except RuntimeError:
+            return None
+        return profiler
+
+    def _stop_profiler(self, profiler, trace_id):
+        """Stop a profiler and save its output; the saved path, or None if it could not be written"""
+        try:
+            if self.profiler == 'cprofile':
+                try:
+                    profiler.disable()
+                finally:
+                    _cprofile_lock.release()
+                path = os.path.join(self.profile_dir, f'{trace_id}.prof')
+                os.makedirs(self.profile_dir, exist_ok=True)
+                profiler.dump_stats(path)
+            else:
+                profiler.stop()
+                path = os.path.join(self.profile_dir, f'{trace_id}.folded')
+                os.makedirs(self.profile_dir, exist_ok=True)
+                profiler.dump(path)
+        except OSError:
+            return None
+        return path
+
+    def _write(self, record):
+        line = json.dumps(record, default=str) + '\n'
+        try:
+            with self._lock, open(self.path, 'a') as f:
+                f.write(line)
+        except OSError as e:
+            warnings.warn(f'Could not write trace to {self.path}: {e}')
+
+_tracer = Tracer.from_env()
+
+def configure(**settings):
+    """Replace the process-wide tracer, e.g. configure(path='traces.jsonl', profile_rate=0.05)"""
+    global _tracer
+    _tracer = Tracer(**settings)
+    return _tracer
+
+def trace_request(name, **attributes):
+    """Trace one request on the process-wide tracer"""
+    return _tracer.request(name, **attributes)
+
+@contextmanager
+def _span(trace, name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        trace.spans.append({'name': name, 'offset_ms': (start - trace.start) * 1000,
+                            'duration_ms': (end - start) * 1000})
+
+def span(name):
+    """Time a block as part of the current request; free when nothing is being traced"""
+    trace = getattr(_local, 'trace', None)
+    return _null if trace is None else _span(trace, name)
+
+def read_traces(path):
+    """One row per traced request, with total milliseconds per span name as columns"""
+    rows = []
+    with open(path) as f:
+        for line in f:
+            record = json.loads(line)
+            row = {key: record[key] for key in ('trace_id', 'name', 'duration_ms', 'profile')}
+            row.update(record['attributes'])
+            for item in record['spans']:
+                row[f"{item['name']}_ms"] = row.get(f"{item['name']}_ms", 0.0) + item['duration_ms']
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description='Show the slowest traced requests and their span breakdown')
+    parser.add_argument('traces', help='JSONL file written with TRACE_FILE')
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    traces = read_traces(args.traces)
+    if traces.empty:
+        print('No traces recorded')
+        return
+    print(f"{len(traces)} requests, p50 {traces['duration_ms'].median():.1f} ms, "
+          f"p95 {traces['duration_ms'].quantile(0.95):.1f} ms, max {traces['duration_ms'].max():.1f} ms\n")
+    slowest = traces.sort_values('duration_ms', ascending=False).head(args.top)
+    print(slowest.round(2).to_string(index=False))
+
+if __name__ == '__main__':
+    main()
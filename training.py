@@ -0,0 +1,130 @@
+import argparse
+import multiprocessing
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import LabelEncoder
+from sklearn.svm import LinearSVC
+from sklearn.utils.class_weight import compute_sample_weight
+
+from resource_usage import peak_rss_mb
+
+# Ways of handling class imbalance, from the notebooks' SMOTE to memory-light options
+STRATEGIES = ('none', 'smote', 'class_weight', 'sample_weight', 'streamed')
+
+def smote_available():
+    try:
+        import imblearn  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def build_classifier(model_name, C=1.0, class_weight=None, random_state=42):
+    """Unfitted classifier with the notebooks' settings"""
+    if model_name == 'Logistic Regression':
+        return LogisticRegression(C=C, class_weight=class_weight, max_iter=500, random_state=random_state)
+    return LinearSVC(C=C, class_weight=class_weight, random_state=random_state)
+
+def _fit_streamed(model_name, X, y, C, batch_size, epochs, random_state):
+    """SGD on class-balanced mini-batches drawn with replacement
+
+    Each epoch draws as many rows as SMOTE would produce (every class up to
+    the majority count), but only one mini-batch of rows is materialized at
+    a time and no synthetic neighbours are computed.
+    """
+    rng = np.random.default_rng(random_state)
+    classes, counts = np.unique(y, return_counts=True)
+    probabilities = 1.0 / (len(classes) * counts[np.searchsorted(classes, y)])
+    rows_per_epoch = len(classes) * counts.max()
+
+    loss = 'log_loss' if model_name == 'Logistic Regression' else 'hinge'
+    model = SGDClassifier(loss=loss, alpha=1.0 / (C * rows_per_epoch), random_state=random_state)
+    for _ in range(epochs):
+        for _ in range(0, rows_per_epoch, batch_size):
+            batch = rng.choice(len(y), size=batch_size, p=probabilities)
+            model.partial_fit(X[batch], y[batch], classes=classes)
+    return model
+
+def fit_balanced(model_name, X, y, strategy='class_weight', C=1.0, batch_size=4096, epochs=5, random_state=42):
+    """Fit a classifier using one of STRATEGIES to handle class imbalance"""
+    y = np.asarray(y)
+    if strategy == 'smote':
+        from imblearn.over_sampling import SMOTE
+        X, y = SMOTE(random_state=random_state).fit_resample(X, y)
+        return build_classifier(model_name, C, random_state=random_state).fit(X, y)
+    if strategy == 'class_weight':
+        return build_classifier(model_name, C, class_weight='balanced', random_state=random_state).fit(X, y)
+    if strategy == 'sample_weight':
+        model = build_classifier(model_name, C, random_state=random_state)
+        return model.fit(X, y, sample_weight=compute_sample_weight('balanced', y))
+    if strategy == 'streamed':
+        return _fit_streamed(model_name, X, y, C, batch_size, epochs, random_state)
+    if strategy == 'none':
+        return build_classifier(model_name, C, random_state=random_state).fit(X, y)
+    raise ValueError(f'Unknown balancing strategy: {strategy}')
+
+def _measure(model_name, strategy, X_train, y_train, X_test, y_test):
+    baseline_mb = peak_rss_mb()
+    start = time.perf_counter()
+    model = fit_balanced(model_name, X_train, y_train, strategy)
+    train_seconds = time.perf_counter() - start
+    peak_mb = peak_rss_mb()
+    y_pred = model.predict(X_test)
+    return {
+        'strategy': strategy,
+        'train_seconds': train_seconds,
+        'peak_ram_mb': None if peak_mb is None else peak_mb - baseline_mb,
+        'accuracy': accuracy_score(y_test, y_pred),
+        'macro_f1': f1_score(y_test, y_pred, average='macro'),
+    }
+
+def compare_strategies(model_name, X_train, y_train, X_test, y_test, strategies=STRATEGIES):
+    """Training time, extra peak RAM and test scores for each balancing strategy
+
+    Every strategy is fitted in a fresh process so that its peak memory is
+    not hidden by an earlier, larger strategy.
+    """
+    if 'smote' in strategies and not smote_available():
+        warnings.warn('imbalanced-learn is not installed; skipping the SMOTE strategy')
+        strategies = [strategy for strategy in strategies if strategy != 'smote']
+    context = multiprocessing.get_context('spawn')
+    rows = []
+    for strategy in strategies:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            rows.append(executor.submit(_measure, model_name, strategy, X_train, y_train, X_test, y_test).result())
+    return pd.DataFrame(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare SMOTE with memory-light class balancing')
+    parser.add_argument('data', help="CSV with 'complaints' and 'product' columns")
+    parser.add_argument('--model', default='Logistic Regression',
+                        choices=['Logistic Regression', 'Support Vector Machine'])
+    parser.add_argument('--strategies', nargs='+', choices=STRATEGIES, help='default: all of them')
+    args = parser.parse_args()
+    if args.strategies and 'smote' in args.strategies and not smote_available():
+        parser.error('--strategies smote needs imbalanced-learn (pip install imbalanced-learn)')
+    strategies = args.strategies or STRATEGIES
+
+    from text_cache import clean_cached
+
+    df = pd.read_csv(args.data).dropna(subset=['complaints', 'product'])
+    X = clean_cached(df['complaints'])
+    y = LabelEncoder().fit_transform(df['product'])
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+    tfidf = TfidfVectorizer(max_features=10000, ngram_range=(1, 2), min_df=2, max_df=0.95)
+    X_train_tfidf = tfidf.fit_transform(X_train)
+    X_test_tfidf = tfidf.transform(X_test)
+
+    print(f'Class counts: {np.bincount(y_train)}')
+    results = compare_strategies(args.model, X_train_tfidf, y_train, X_test_tfidf, y_test, strategies)
+    print(results.round(4).to_string(index=False))
+
+if __name__ == '__main__':
+    main()